@@ -1,4 +1,6 @@
-from days.lib.input import to_digits, to_int, load_input
+import numpy as np
+
+from days.lib.input import to_digits, to_int, load_cached, load_uints
 
 def fast_sum_in_range(start: int, end: int) -> int:
     assert start <= end
@@ -35,7 +37,9 @@ def num_invalid_ids_n_digits_between(start: int, end: int):
     return count, full_sum
 
 
-def invalid_ids_n_digits(start: list[int] | None, end: list[int] | None):
+def invalid_ids_n_digits(
+    start: list[int] | None, end: list[int] | None, *, verbose: bool = False
+):
     assert start is None or end is None or len(start) == len(end)
     assert start is not None or end is not None
 
@@ -56,13 +60,15 @@ def invalid_ids_n_digits(start: list[int] | None, end: list[int] | None):
     end_int = to_int(end)
 
     total_count, total_sum = num_invalid_ids_n_digits_between(start_int, end_int)
-    print(
-        f"Total invalid IDs between {start_int}-{end_int}: {total_count}, Sum: {total_sum}"
-    )
+    if verbose:
+        print(
+            f"Total invalid IDs between {start_int}-{end_int}: {total_count}, "
+            f"Sum: {total_sum}"
+        )
     return total_count, total_sum
 
 
-def find_invalid_ids(start: int, end: int):
+def find_invalid_ids(start: int, end: int, *, verbose: bool = False):
     assert start <= end
 
     start_digits = to_digits(start)
@@ -85,23 +91,120 @@ def find_invalid_ids(start: int, end: int):
         else:
             e_digits = None
 
-        new_count, new_sum = invalid_ids_n_digits(s_digits, e_digits)
+        new_count, new_sum = invalid_ids_n_digits(s_digits, e_digits, verbose=verbose)
         total_count += new_count
         total_sum += new_sum
 
     return total_count, total_sum
 
 
-if __name__ == "__main__":
-    input_data = load_input(__file__)
-    data_line = next(iter(input_data))
-    ranges = data_line.split(",")
+def merge_ranges(starts: np.ndarray, ends: np.ndarray):
+    # union of the inclusive ranges, so overlapping spans are counted once
+    if len(starts) == 0:
+        return starts, ends
+    order = np.argsort(starts, kind="stable")
+    starts, ends = starts[order], ends[order]
+    reach = np.maximum.accumulate(ends)
+    new = np.ones(len(starts), dtype=bool)
+    new[1:] = starts[1:] > reach[:-1]
+    begins = np.flatnonzero(new)
+    return starts[begins], np.maximum.reduceat(reach, begins)
+
+
+def _total(values: np.ndarray) -> int:
+    # exact sum of non-negative int64 values, as 32-bit halves
+    if values.dtype == object:
+        return int(values.sum())
+    high = int((values >> 32).sum())
+    low = int((values & 0xFFFFFFFF).sum())
+    return (high << 32) + low
+
+
+def periodic_ids_between(starts, ends, n_digits: int, period: int):
+    # count and sum of the `n_digits`-digit numbers in the ranges that are a
+    # `period`-digit block p repeated, i.e. p * (10**N - 1) / (10**period - 1)
+    repunit = (10**n_digits - 1) // (10**period - 1)
+    lo = np.maximum(-(-starts // repunit), 10 ** (period - 1))
+    hi = np.minimum(ends // repunit, 10**period - 1)
+    count = np.maximum(hi - lo + 1, 0)
+    block_sum = np.where(count > 0, count * (lo + hi) // 2, 0)
+    return _total(count), repunit * _total(block_sum)
+
+
+def mobius(n: int) -> int:
+    result = 1
+    p = 2
+    while p * p <= n:
+        if n % p == 0:
+            n //= p
+            if n % p == 0:
+                return 0
+            result = -result
+        p += 1
+    return -result if n > 1 else result
+
+
+def period_terms(n_digits: int, repeats: int | None) -> list[tuple[int, int]]:
+    # (period, coefficient) pairs whose periodic sets add up to the invalid
+    # `n_digits`-digit IDs. A block repeated exactly `repeats` times is one
+    # set; "any number of times" is the union over the proper divisors d,
+    # where P_d & P_e = P_gcd(d, e), so by Mobius inversion
+    # |union| = sum over d | N, d < N of -mu(N / d) * |P_d|
+    if repeats is not None:
+        if n_digits % repeats or repeats < 2:
+            return []
+        return [(n_digits // repeats, 1)]
+    return [
+        (d, -mobius(n_digits // d))
+        for d in range(1, n_digits)
+        if n_digits % d == 0 and mobius(n_digits // d)
+    ]
+
+
+def invalid_id_totals(
+    starts,
+    ends,
+    *,
+    repeats: int | None = 2,
+    merge: bool = True,
+    verbose: bool = False,
+):
+    """Count and sum of the invalid IDs in all ranges.
+
+    An invalid ID is a digit block repeated `repeats` times, or any number
+    of times (at least twice) with `repeats=None`. Works on whole arrays of
+    bounds: int64 while every bound is below 1e18, so per-range block sums
+    cannot overflow, Python ints otherwise.
+    """
+    starts = np.asarray(starts)
+    ends = np.asarray(ends)
+    small = len(ends) == 0 or int(ends.max()) < 10**18
+    starts = starts.astype(np.int64 if small else object)
+    ends = ends.astype(np.int64 if small else object)
+    if merge:
+        starts, ends = merge_ranges(starts, ends)
+    if len(starts) == 0:
+        return 0, 0
+
+    total_count = total_sum = 0
+    for n_digits in range(len(str(int(starts.min()))), len(str(int(ends.max()))) + 1):
+        count = id_sum = 0
+        for period, coefficient in period_terms(n_digits, repeats):
+            c, s = periodic_ids_between(starts, ends, n_digits, period)
+            count += coefficient * c
+            id_sum += coefficient * s
+        if verbose and count:
+            print(f"{n_digits}-digit invalid IDs: {count}, Sum: {id_sum}")
+        total_count += count
+        total_sum += id_sum
+    return total_count, total_sum
 
-    total = 0
-    for r in ranges:
-        start_s, end_s = r.split("-")
-        start = int(start_s)
-        end = int(end_s)
-        total += (result := find_invalid_ids(start, end)[1])
+
+if __name__ == "__main__":
+    # "a-b,c-d,..." on one line
+    ranges = load_cached(__file__, "ranges", lambda f: load_uints(f, columns=2))
+    _, total = invalid_id_totals(ranges[:, 0], ranges[:, 1])
+    _, total_any = invalid_id_totals(ranges[:, 0], ranges[:, 1], repeats=None)
 
     print(f"Sum of invalid IDs in all ranges: {total}")
+    print(f"Sum of IDs repeating a block any number of times: {total_any}")
@@ -1,5 +1,5 @@
 import numpy as np
-from days.lib.input import to_digits, load_input
+from days.lib.input import load_cached, load_digits
 
 
 def max_number(digits: list[int], out_digits: int) -> int:
@@ -15,14 +15,126 @@ def max_number(digits: list[int], out_digits: int) -> int:
     return digits[left_digit] * (10 ** (out_digits - 1)) + right_digits
 
 
-def solve_part1(nums: list[int]) -> int:
-    return sum(max_number(to_digits(num), 2) for num in nums)
+def _next_occurrence(digits: np.ndarray) -> np.ndarray:
+    # nxt[d, r, i]: first j >= i with digits[r, j] == d, else the row length
+    rows, length = digits.shape
+    position = np.arange(length, dtype=np.int32)
+    nxt = np.empty((10, rows, length), dtype=np.int32)
+    for d in range(10):
+        hit = np.where(digits == d, position, length)
+        nxt[d] = np.minimum.accumulate(hit[:, ::-1], axis=1)[:, ::-1]
+    return nxt
 
-def solve_part2(nums: list[int]) -> int:
-    return sum(max_number(to_digits(num), 12) for num in nums)
+
+def max_numbers(digits: np.ndarray, out_digits: int) -> np.ndarray:
+    """`max_number` for every row of a uint8 digit matrix at once.
+
+    Returns the picked digits, one row of `out_digits` per input row: each
+    output digit is the leftmost largest digit that still leaves enough
+    digits after it, looked up in per-digit next-occurrence tables.
+    """
+    digits = np.asarray(digits, dtype=np.uint8)
+    rows, length = digits.shape
+    if length < out_digits:
+        raise ValueError(f"cannot pick {out_digits} digits from {length}")
+    nxt = _next_occurrence(digits)
+    present = np.flatnonzero(np.bincount(digits.ravel(), minlength=10))[::-1]
+
+    row = np.arange(rows)
+    start = np.zeros(rows, dtype=np.int32)
+    picked = np.zeros((rows, out_digits), dtype=np.uint8)
+    for t in range(out_digits):
+        last = length - out_digits + t  # latest position that leaves room
+        pos = np.full(rows, length, dtype=np.int32)
+        for d in present:
+            j = nxt[d, row, start]
+            take = (pos == length) & (j <= last)
+            pos[take] = j[take]
+            picked[take, t] = d
+        start = pos + 1
+    return picked
+
+
+def digits_to_ints(picked: np.ndarray) -> list[int]:
+    # exact Python ints, via uint64 Horner while that cannot overflow
+    rows, width = picked.shape
+    if width <= 19:
+        values = np.zeros(rows, dtype=np.uint64)
+        for column in picked.T:
+            values = values * np.uint64(10) + column
+        return values.tolist()
+    text = (picked + np.uint8(ord("0"))).tobytes()
+    return [int(text[i : i + width]) for i in range(0, len(text), width)]
+
+
+def sum_max_numbers(digits: np.ndarray, out_digits: int, *, chunk_rows=None) -> int:
+    # rows go through max_numbers in chunks bounding the next-occurrence
+    # tables (10 x rows x length int32) to ~64 MiB; the sum is taken per
+    # output column with Python ints so it is exact for any width
+    digits = np.asarray(digits, dtype=np.uint8)
+    rows, length = digits.shape
+    if chunk_rows is None:
+        chunk_rows = max(1, (1 << 24) // (10 * max(length, 1)))
+    column_sums = np.zeros(out_digits, dtype=np.int64)
+    for begin in range(0, rows, chunk_rows):
+        picked = max_numbers(digits[begin : begin + chunk_rows], out_digits)
+        column_sums += picked.sum(axis=0, dtype=np.int64)
+    total = 0
+    for column_sum in column_sums.tolist():
+        total = total * 10 + column_sum
+    return total
+
+
+def max_digits(line, out_digits: int, *, out=None):
+    """Greedy max subsequence of `out_digits` digits of `line`, in O(len(line)).
+
+    `line` is any buffer of digit bytes (ASCII or 0-9 values, e.g. bytes, a
+    uint8 array or a memory-mapped line); the picked digits come back in the
+    same encoding as a bytearray, or are written to the binary stream `out`.
+    Extra memory is the `out_digits`-byte stack, whatever the line length.
+    """
+    data = memoryview(line).cast("B")
+    drop = len(data) - out_digits  # digits that may still be skipped
+    if drop < 0:
+        raise ValueError(f"cannot pick {out_digits} digits from {len(data)}")
+    stack = bytearray()
+    for i, c in enumerate(data):
+        if not drop:
+            # nothing left to skip: the rest is taken verbatim
+            stack += data[i : i + out_digits - len(stack)]
+            break
+        while drop and stack and stack[-1] < c:
+            stack.pop()
+            drop -= 1
+        if len(stack) < out_digits:
+            stack.append(c)
+        else:
+            drop -= 1
+    if out is not None:
+        out.write(stack)
+        return None
+    return stack
+
+
+def sum_max_digits(lines, out_digits: int) -> int:
+    # sum over `max_digits` of each line, exact, without building giant ints
+    column_sums = np.zeros(out_digits, dtype=np.int64)
+    for line in lines:
+        picked = np.frombuffer(max_digits(line, out_digits), dtype=np.uint8)
+        column_sums += picked % np.uint8(ord("0"))  # ASCII or 0-9 values
+    total = 0
+    for column_sum in column_sums.tolist():
+        total = total * 10 + column_sum
+    return total
+
+
+def solve_part1(banks: np.ndarray) -> int:
+    return sum_max_numbers(banks, 2)
+
+def solve_part2(banks: np.ndarray) -> int:
+    return sum_max_numbers(banks, 12)
 
 
 if __name__ == "__main__":
-    input_data = load_input(__file__)
-    numbers = [int(line) for line in input_data]
-    print(solve_part2(numbers))
+    banks = load_cached(__file__, "digits", load_digits)
+    print(solve_part2(banks))
@@ -1,29 +1,340 @@
+import heapq
+import itertools
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+
 import numpy as np
 
-from days.lib.input import load_input
+from days.lib.input import load_cached, load_uints
+
+
+LIMB_BITS = 16  # limb products summed over a few dimensions stay below 2**53
+
+
+def _tile_dist2_broadcast(A, B):
+    # squared distances between each row of A and each row of B, (len(A), len(B))
+    # accumulated one dimension at a time so no (n, n, 3) tensor is built;
+    # int64 wraparound matches the full broadcast bit for bit
+    dist2 = np.zeros((A.shape[0], B.shape[0]), dtype=np.int64)
+    for d in range(A.shape[1]):
+        diff = A[:, None, d] - B[None, :, d]
+        dist2 += diff * diff
+    return dist2.view(np.uint64)
+
+
+def _tile_dist2_gemm(A, B):
+    # the same values as |a|^2 + |b|^2 - 2 a.b, with the cross term from a BLAS
+    # matmul. Both tiles are moved to a common origin first (differences are
+    # unchanged mod 2**64), so the width that matters is the tiles' span, much
+    # like COORD_BIT_WIDTH in the RTL
+    if A.size == 0 or B.size == 0:
+        return np.zeros((A.shape[0], B.shape[0]), dtype=np.uint64)
+    origin = np.minimum(A.min(axis=0), B.min(axis=0))
+    A = (A - origin).view(np.uint64)
+    B = (B - origin).view(np.uint64)
+    width = int(max(A.max(), B.max())).bit_length()
+
+    if (2 * A.shape[1]) << (2 * width) <= 1 << 53:
+        # every product, norm and partial sum is an integer float64 holds exactly
+        Af, Bf = A.astype(np.float64), B.astype(np.float64)
+        dist2 = Af @ Bf.T
+        dist2 *= -2
+        dist2 += np.einsum("ij,ij->i", Af, Af)[:, None]
+        dist2 += np.einsum("ij,ij->i", Bf, Bf)[None, :]
+        return dist2.astype(np.uint64)
+
+    # wider: split into 16-bit limbs, so each matmul is exact in float64, and
+    # recombine in wrapping uint64 arithmetic. Limb pairs are grouped by shift
+    # p + q, one matmul per shift; shifts of 64 bits or more vanish
+    limbs = -(-width // LIMB_BITS)
+    mask = np.uint64((1 << LIMB_BITS) - 1)
+    shifts = [np.uint64(LIMB_BITS * p) for p in range(limbs)]
+    A_limbs = [((A >> s) & mask).astype(np.float64) for s in shifts]
+    B_limbs = [((B >> s) & mask).astype(np.float64) for s in shifts]
+    dist2 = (A * A).sum(axis=1)[:, None] + (B * B).sum(axis=1)[None, :]
+    for shift in range(min(2 * limbs - 1, 64 // LIMB_BITS)):
+        ps = range(max(0, shift - limbs + 1), min(shift, limbs - 1) + 1)
+        part = np.hstack([A_limbs[p] for p in ps]) @ np.hstack(
+            [B_limbs[shift - p] for p in ps]
+        ).T
+        part = part.astype(np.uint64)
+        part <<= np.uint64(LIMB_BITS * shift + 1)  # 2 a.b
+        dist2 -= part
+    return dist2
+
+
+DIST2_KERNELS = {
+    "broadcast": _tile_dist2_broadcast,
+    "gemm": _tile_dist2_gemm,
+}
+
+
+def _tile_dist2(A, B, kernel="gemm"):
+    return DIST2_KERNELS[kernel](A, B)
 
 
-def top_k_closest_pairs_l2(X, k):
+def _select_k(dist, iu, ju, k):
+    # k smallest pairs, ordered by (distance, i, j)
+    if len(dist) > k:
+        kth = np.partition(dist, k - 1)[k - 1]
+        keep = dist <= kth
+        dist, iu, ju = dist[keep], iu[keep], ju[keep]
+    order = np.lexsort((ju, iu, dist))[:k]
+    return dist[order], iu[order], ju[order]
+
+
+def _after_mask(dist, iu, ju, after):
+    # pairs strictly after the (distance, i, j) key `after`
+    ad, ai, aj = after
+    return (dist > ad) | ((dist == ad) & ((iu > ai) | ((iu == ai) & (ju > aj))))
+
+
+def _concat_candidates(candidates):
+    return tuple(np.concatenate(parts) for parts in zip(*candidates))
+
+
+def top_k_closest_pairs_l2(
+    X, k, *, block_size=1024, after=None, row_blocks=None, kernel="gemm"
+):
+    # `after` resumes the sorted order: only pairs whose (distance, i, j) key is
+    # strictly greater are considered. `row_blocks` limits the walk to a range
+    # of row blocks (in x-sorted order), which partitions the pairs for workers.
+    # `kernel` picks a DIST2_KERNELS entry; they agree bit for bit
     n = X.shape[0]
     X = X.astype(np.int64)  # allow negative diffs
+    k = min(k, n * (n - 1) // 2)
 
-    diff = X[:, None] - X[None, :]  # (n,n,3) int64
-    dist2 = np.sum(diff**2, axis=-1).astype(np.uint64)  # uint64
+    # sort along x so each block is a thin slab: tiles far apart in x can be
+    # dropped as soon as the running k-th distance is known
+    perm = np.argsort(X[:, 0], kind="stable")
+    Xs = X[perm]
+    starts = list(range(0, n, block_size))
+    lo = np.array([Xs[s : s + block_size].min(axis=0) for s in starts])
+    hi = np.array([Xs[s : s + block_size].max(axis=0) for s in starts])
 
-    iu, ju = np.triu_indices(n, k=1)  # relevant indices (excludes self-pairs)
-    flat = dist2[iu, ju]
+    # box distances are only a valid bound when no squared distance wraps
+    span = X.max(axis=0) - X.min(axis=0) if n else []
+    prunable = sum(int(s) ** 2 for s in span) < 2**64
 
-    k = min(k, len(flat))
-    # first, get the indices of the k smallest
-    idx = np.argpartition(flat, k - 1)[:k]
-    # then, actually sort these k
-    order = np.argsort(flat[idx])
+    best = (np.empty(0, np.uint64), np.empty(0, np.intp), np.empty(0, np.intp))
+    pending = []
+    pending_count = 0
+    threshold = None  # current k-th distance, once k candidates are held
 
-    return (np.column_stack((iu[idx[order]], ju[idx[order]])), flat[idx[order]])
+    if row_blocks is None:
+        row_blocks = (0, len(starts))
 
+    for rb in range(*row_blocks):
+        r0 = starts[rb]
+        rows = Xs[r0 : r0 + block_size]
+        for cb in range(rb, len(starts)):
+            c0 = starts[cb]
+            if threshold is not None and prunable:
+                gap_x = max(0, int(lo[cb, 0]) - int(hi[rb, 0]))
+                if gap_x**2 > threshold:
+                    break  # every later column block is further away in x
+                gap = np.maximum(0, np.maximum(lo[rb] - hi[cb], lo[cb] - hi[rb]))
+                if sum(int(g) ** 2 for g in gap) > threshold:
+                    continue
+            if after is not None and prunable:
+                far = np.maximum(np.abs(hi[rb] - lo[cb]), np.abs(hi[cb] - lo[rb]))
+                if sum(int(f) ** 2 for f in far) < after[0]:
+                    continue  # everything in this tile was already passed
 
-def top_m_cc_sizes(pairs, m):
-    n = np.max(pairs) + 1
+            dist2 = _tile_dist2(rows, Xs[c0 : c0 + block_size], kernel)
+            if rb == cb:
+                keep = np.triu(np.ones(dist2.shape, dtype=bool), k=1)
+            else:
+                keep = np.ones(dist2.shape, dtype=bool)
+            if threshold is not None:
+                keep &= dist2 <= threshold
+            if after is not None:
+                keep &= dist2 >= after[0]
+
+            p, q = np.nonzero(keep)
+            a, b = perm[r0 + p], perm[c0 + q]
+            candidate = (dist2[p, q], np.minimum(a, b), np.maximum(a, b))
+            if after is not None:
+                mask = _after_mask(*candidate, after)
+                candidate = tuple(c[mask] for c in candidate)
+            pending.append(candidate)
+            pending_count += len(candidate[0])
+
+            if pending_count >= max(k, block_size * block_size):
+                best = _select_k(*_concat_candidates([best, *pending]), k)
+                pending, pending_count = [], 0
+                if len(best[0]) == k:
+                    threshold = int(best[0][-1])
+
+    dist, iu, ju = _select_k(*_concat_candidates([best, *pending]), k)
+    return np.column_stack((iu, ju)), dist
+
+
+_worker_coords = None
+
+
+def _init_worker(X):
+    global _worker_coords
+    _worker_coords = X
+
+
+def _top_k_row_blocks(args):
+    k, block_size, row_blocks = args
+    pairs, dist = top_k_closest_pairs_l2(
+        _worker_coords, k, block_size=block_size, row_blocks=row_blocks
+    )
+    return dist, pairs
+
+
+def top_k_closest_pairs_parallel(X, k, *, workers=None, block_size=1024):
+    n = X.shape[0]
+    workers = workers or os.cpu_count() or 1
+    n_blocks = -(-n // block_size)
+
+    # row block rb pairs with n_blocks - rb column blocks; cut the triangle into
+    # a few equal-work tasks per worker so pruning imbalance evens out
+    work = np.cumsum(np.arange(n_blocks, 0, -1))
+    tasks = max(1, min(n_blocks, workers * 4))
+    cuts = {0, n_blocks}
+    if n_blocks:
+        targets = work[-1] * np.arange(1, tasks) / tasks
+        cuts.update(int(c) + 1 for c in np.searchsorted(work, targets))
+    cuts = sorted(cuts)
+    jobs = [(k, block_size, (lo, hi)) for lo, hi in itertools.pairwise(cuts) if lo < hi]
+
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(X,)) as pool:
+        results = list(pool.map(_top_k_row_blocks, jobs))
+
+    # every task is already sorted by (distance, i, j): k-way merge the heads
+    merged = heapq.merge(
+        *(zip(d.tolist(), p[:, 0].tolist(), p[:, 1].tolist()) for d, p in results)
+    )
+    best = list(itertools.islice(merged, k))
+    dist = np.array([d for d, _, _ in best], dtype=np.uint64)
+    pairs = np.array([(i, j) for _, i, j in best], dtype=np.intp).reshape(-1, 2)
+    return pairs, dist
+
+
+def _expand_ranges(src, begin, end):
+    # all (s, t) with t in [begin[s], end[s]) for each s
+    lengths = end - begin
+    total = int(lengths.sum())
+    offsets = np.repeat(np.cumsum(lengths) - lengths, lengths)
+    dst = np.arange(total) - offsets + np.repeat(begin, lengths)
+    return np.repeat(src, lengths), dst
+
+
+def _grid(X, r2):
+    # bucket the points into a uniform grid whose cells are at least sqrt(r2)
+    # wide, so a pair within r2 always sits in the same or neighbouring cells
+    cell = max(1, math.isqrt(max(r2, 1) - 1) + 1)  # ceil(sqrt(r2)), exactly
+    span = X.max(axis=0) - X.min(axis=0)
+    while np.prod([int(s) // cell + 3 for s in span]) >= 2**62:
+        cell *= 2  # keep the flattened cell keys inside int64
+    cells = (X - X.min(axis=0)) // cell + 1  # pad by one so offsets never alias
+    dims = cells.max(axis=0) + 2
+    keys = (cells[:, 0] * dims[1] + cells[:, 1]) * dims[2] + cells[:, 2]
+
+    order = np.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+    uniq, first, counts = np.unique(sorted_keys, return_index=True, return_counts=True)
+    # half of the 26 neighbours, so each pair of cells is visited once
+    offsets = [
+        ((dx - 1) * dims[1] + (dy - 1)) * dims[2] + (dz - 1)
+        for dx, dy, dz in np.ndindex(3, 3, 3)
+    ]
+    offsets = [offset for offset in offsets if offset > 0]
+    return order, sorted_keys, uniq, first, counts, offsets
+
+
+def _grid_candidates(grid):
+    # how many pairs _grid_pairs_within would measure, from the cell sizes alone
+    _, _, uniq, _, counts, offsets = grid
+    total = int((counts * (counts - 1) // 2).sum())
+    for offset in offsets:
+        c = np.minimum(np.searchsorted(uniq, uniq + offset), len(uniq) - 1)
+        total += int((counts * np.where(uniq[c] == uniq + offset, counts[c], 0)).sum())
+    return total
+
+
+def _grid_pairs_within(X, r2, grid=None):
+    # every pair (i < j) with squared distance <= r2, checking only the points
+    # in the same and neighbouring cells
+    order, sorted_keys, uniq, first, counts, offsets = grid or _grid(X, r2)
+    cell_of = np.repeat(np.arange(len(uniq)), counts)
+    pos = np.arange(len(order))
+
+    # same cell: partners after this point; other cells: half of the neighbours
+    src, dst = _expand_ranges(pos, pos + 1, first[cell_of] + counts[cell_of])
+    parts = [(src, dst)]
+    for offset in offsets:
+        target = sorted_keys + offset
+        c = np.minimum(np.searchsorted(uniq, target), len(uniq) - 1)
+        hit = uniq[c] == target
+        begin = np.where(hit, first[c], 0)
+        end = np.where(hit, first[c] + counts[c], 0)
+        parts.append(_expand_ranges(pos, begin, end))
+
+    src = order[np.concatenate([p[0] for p in parts])]
+    dst = order[np.concatenate([p[1] for p in parts])]
+    dist2 = np.zeros(len(src), dtype=np.int64)
+    for d in range(X.shape[1]):
+        diff = X[src, d] - X[dst, d]
+        dist2 += diff * diff
+    dist2 = dist2.view(np.uint64)
+
+    keep = dist2 <= r2
+    src, dst = src[keep], dst[keep]
+    return dist2[keep], np.minimum(src, dst), np.maximum(src, dst)
+
+
+def top_k_closest_pairs_grid(X, k):
+    n = X.shape[0]
+    total_pairs = n * (n - 1) // 2
+    X = X.astype(np.int64)  # allow negative diffs
+    span = X.max(axis=0) - X.min(axis=0) if n else np.zeros(3, dtype=np.int64)
+    max_r2 = sum(int(s) ** 2 for s in span)  # no pair is further apart
+    if k >= total_pairs or max_r2 >= 2**64:
+        # nothing to gain, or distances wrap and radii stop being meaningful
+        return top_k_closest_pairs_l2(X, k)
+
+    # radius that would hold about k pairs for uniformly spread points
+    volume = float(np.prod(span.astype(np.float64) + 1))
+    r2 = max(1, int((3 * k * volume / (2 * np.pi * n * n)) ** (2 / 3)))
+    r2 = min(r2, max_r2)
+
+    # clustered points (or a single far outlier) make the volume a poor guide,
+    # so shrink the radius while its cells would pair up far more than k points;
+    # once it has grown, the k-th distance is known to be beyond r2 / 4
+    budget = 64 * k + n
+    shrinking = True
+    while True:
+        grid = _grid(X, r2)
+        candidates = _grid_candidates(grid)
+        if shrinking and candidates > budget and r2 > 1:
+            # candidates grow roughly with the cube of the radius
+            r2 = max(1, min(r2 // 4, int(r2 * (k / candidates) ** (2 / 3))))
+            continue
+        dist, iu, ju = _grid_pairs_within(X, r2, grid)
+        if len(dist) >= k or r2 >= max_r2:
+            # every pair outside the radius is further than all k found inside
+            break
+        shrinking = False
+        r2 = min(4 * r2, max_r2)
+
+    dist, iu, ju = _select_k(dist, iu, ju, k)
+    return np.column_stack((iu, ju)), dist
+
+
+TOP_K_METHODS = {
+    "tiled": top_k_closest_pairs_l2,
+    "grid": top_k_closest_pairs_grid,
+    "parallel": top_k_closest_pairs_parallel,
+}
+
+
+def _cc_roots_python(pairs, n):
     parent = np.arange(n, dtype=np.intp)
     rank = np.zeros(n, dtype=np.intp)  # union-by-rank
 
@@ -56,7 +367,43 @@ def top_m_cc_sizes(pairs, m):
     root_ids = np.empty(n, dtype=np.intp)
     for i in range(n):
         root_ids[i] = find(i)
-    sizes = np.bincount(root_ids)
+    return root_ids
+
+
+def _cc_roots_batched(pairs, n):
+    # hook-and-jump over the whole edge list at once: every root hooks onto the
+    # smallest root it shares an edge with, then pointer jumping flattens the
+    # forest again. parent[x] <= x always holds, so the root of each component
+    # is its smallest node.
+    parent = np.arange(n, dtype=np.intp)
+    u = np.asarray(pairs[:, 0], dtype=np.intp)
+    v = np.asarray(pairs[:, 1], dtype=np.intp)
+    while True:
+        pu, pv = parent[u], parent[v]
+        live = pu != pv
+        if not live.any():
+            break
+        # edges inside one component stay there, drop them for later rounds
+        u, v, pu, pv = u[live], v[live], pu[live], pv[live]
+        np.minimum.at(parent, np.maximum(pu, pv), np.minimum(pu, pv))
+        while True:
+            grand = parent[parent]
+            if np.array_equal(grand, parent):
+                break
+            parent = grand
+    return parent
+
+
+CC_BACKENDS = {
+    "python": _cc_roots_python,
+    "batched": _cc_roots_batched,
+}
+
+
+def top_m_cc_sizes(pairs, m, *, backend="batched"):
+    n = np.max(pairs) + 1
+    root_ids = CC_BACKENDS[backend](pairs, n)
+    sizes = np.bincount(root_ids, minlength=n)
 
     top_m = np.sort(sizes)[::-1][:m]  # top m
 
@@ -70,19 +417,178 @@ def top_m_cc_sizes(pairs, m):
 
     return top_m
 
-def solve_coords(coords, *, k=1000, m=3):
-    pairs, distances = top_k_closest_pairs_l2(coords, k)
+def solve_coords(coords, *, k=1000, m=3, method="tiled"):
+    pairs, distances = TOP_K_METHODS[method](coords, k)
     print("top k pairs of node indices:", pairs)
     print("Top k closest pair distances:", distances)
     top_sizes = top_m_cc_sizes(pairs, m)
     return top_sizes, int(np.prod(top_sizes)), pairs, distances
 
+def iter_sorted_pairs(X, *, chunk_size=1024, growth=2, block_size=1024):
+    # lazily yield (pairs, distances) chunks in global (distance, i, j) order;
+    # each chunk resumes after the last key of the previous one and the chunk
+    # size grows geometrically, so m pairs cost O(log m) passes over the tiles
+    n = X.shape[0]
+    remaining = n * (n - 1) // 2
+    after = None
+    while remaining > 0:
+        pairs, distances = top_k_closest_pairs_l2(
+            X, min(chunk_size, remaining), block_size=block_size, after=after
+        )
+        yield pairs, distances
+        remaining -= len(distances)
+        after = (int(distances[-1]), int(pairs[-1, 0]), int(pairs[-1, 1]))
+        chunk_size *= growth
+
+
+class IncrementalUnionFind:
+    def __init__(self, n):
+        # plain lists: indexing them avoids boxing a NumPy scalar per access
+        self.parent = list(range(n))
+        self.size = [1] * n
+        self.components = n
+
+    def find(self, x):
+        parent = self.parent
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]  # path halving
+            x = parent[x]
+        return x
+
+    def union(self, a, b):
+        ra, rb = self.find(a), self.find(b)
+        if ra == rb:
+            return False
+        if self.size[ra] < self.size[rb]:
+            ra, rb = rb, ra  # union-by-size
+        self.parent[rb] = ra
+        self.size[ra] += self.size[rb]
+        self.components -= 1
+        return True
+
+    def component_sizes(self):
+        roots = [i for i, p in enumerate(self.parent) if i == p]
+        return np.sort(np.array([self.size[r] for r in roots], dtype=np.intp))[::-1]
+
+
+def kruskal_until_connected(X, *, checkpoints=(), chunk_size=1024):
+    # join pairs in distance order until one component remains; returns the
+    # joining pair, the number of pairs consumed and the component sizes
+    # (largest first) after each requested number of pairs. Checkpoints below
+    # 1 or past the joining pair are never reached, so they are not recorded
+    n = X.shape[0]
+    uf = IncrementalUnionFind(n)
+    pending = sorted({c for c in checkpoints if c >= 1}, reverse=True)
+    history = {}
+    used = 0
+    if n <= 1:
+        return None, used, history
+
+    for pairs, _ in iter_sorted_pairs(X, chunk_size=chunk_size):
+        for a, b in pairs.tolist():
+            uf.union(a, b)
+            used += 1
+            while pending and pending[-1] == used:
+                history[pending.pop()] = uf.component_sizes()
+            if uf.components == 1:
+                return (a, b), used, history
+    raise AssertionError("all pairs consumed without connecting every point")
+
+
+class DynamicClosestPairs:
+    """The k closest pairs and their components, under point inserts/deletes.
+
+    Holds a pool of every live pair whose (distance, i, j) key is at most
+    `bound`, which covers the k closest plus a reserve. An insert computes
+    the new point's distances once and keeps only those under the bound,
+    the same pre-filter filtered_fifo applies with the sorter's largest
+    entry; a delete drops the point's pairs and the reserve backfills.
+    Only when the pool runs below k is it rebuilt with the tiled search.
+    Points keep the id they were inserted with (rows of X first).
+    """
+
+    def __init__(self, X, k, *, reserve=None):
+        self.k = k
+        self.reserve = k if reserve is None else reserve
+        X = np.asarray(X).astype(np.int64)
+        self._coords = np.empty((max(16, 2 * len(X)), X.shape[1]), dtype=np.int64)
+        self._coords[: len(X)] = X
+        self._alive = np.zeros(len(self._coords), dtype=bool)
+        self._alive[: len(X)] = True
+        self._count = len(X)
+        self.rebuilds = 0
+        self._rebuild()
+
+    def _rebuild(self):
+        ids = np.flatnonzero(self._alive)
+        want = self.k + self.reserve
+        pairs, dist = top_k_closest_pairs_l2(self._coords[ids], want)
+        pairs = ids[pairs]  # ids is increasing, so i < j and tie order survive
+        self._pool = (dist, pairs[:, 0], pairs[:, 1])
+        if len(dist) < want:
+            self._bound = None  # every live pair is in the pool
+        else:
+            self._bound = tuple(int(c[-1]) for c in self._pool)
+        self.rebuilds += 1
+
+    def insert(self, point):
+        if self._count == len(self._coords):
+            grown = np.empty((2 * len(self._coords), self._coords.shape[1]), np.int64)
+            grown[: self._count] = self._coords[: self._count]
+            self._coords = grown
+            self._alive = np.concatenate([self._alive, np.zeros_like(self._alive)])
+        new = self._count
+        self._coords[new] = point
+        others = np.flatnonzero(self._alive)
+        self._alive[new] = True
+        self._count += 1
+
+        dist = _tile_dist2(self._coords[new : new + 1], self._coords[others])[0]
+        iu = others
+        ju = np.full(len(others), new, dtype=others.dtype)
+        if self._bound is not None:
+            keep = ~_after_mask(dist, iu, ju, self._bound)
+            dist, iu, ju = dist[keep], iu[keep], ju[keep]
+        if len(dist):
+            merged = _concat_candidates([self._pool, (dist, iu, ju)])
+            order = np.lexsort((merged[2], merged[1], merged[0]))
+            self._pool = tuple(c[order] for c in merged)
+            limit = self.k + self.reserve
+            if len(self._pool[0]) > limit + self.reserve:
+                # keep the pool bounded: everything under the new bound stays
+                self._pool = tuple(c[:limit] for c in self._pool)
+                self._bound = tuple(int(c[-1]) for c in self._pool)
+        return new
+
+    def delete(self, point_id):
+        if not (0 <= point_id < self._count and self._alive[point_id]):
+            raise KeyError(point_id)
+        self._alive[point_id] = False
+        dist, iu, ju = self._pool
+        keep = (iu != point_id) & (ju != point_id)
+        self._pool = (dist[keep], iu[keep], ju[keep])
+        if self._bound is not None and len(self._pool[0]) < self.k:
+            self._rebuild()
+
+    def top_k(self):
+        dist, iu, ju = (c[: self.k] for c in self._pool)
+        return np.column_stack((iu, ju)), dist
+
+    def component_sizes(self, m=None):
+        # components of the live points joined by the current k closest pairs
+        pairs, _ = self.top_k()
+        roots = _cc_roots_batched(pairs, self._count)
+        sizes = np.bincount(roots[self._alive[: self._count]])
+        sizes = np.sort(sizes[sizes > 0])[::-1]
+        return sizes if m is None else sizes[:m]
+
+
+def parse_coords(script_file):
+    return load_uints(script_file, columns=3, dtype=np.uint32)
+
+
 def load_coords():
-    coords = []
-    for line in load_input(__file__):
-        new_coords = line.split(",")
-        coords.append([int(c) for c in new_coords])
-    return np.array(coords, dtype=np.uint32)
+    return load_cached(__file__, "coords", parse_coords)
 
 
 def solve():
@@ -94,5 +600,18 @@ def solve():
     print("Product of top sizes:", product)
 
 
+def solve_part2():
+    coords = load_coords()
+    k = 1000
+    m = 3
+    (a, b), used, history = kruskal_until_connected(coords, checkpoints=[k])
+    if k in history:
+        top_sizes = history[k][:m]
+        print(f"Top {m} connected component sizes after {k} pairs:", top_sizes)
+    print(f"Connected after {used} pairs, last pair {a}-{b}")
+    print("Product of last pair x coordinates:", int(coords[a, 0]) * int(coords[b, 0]))
+
+
 if __name__ == "__main__":
     solve()
+    solve_part2()
@@ -4,22 +4,40 @@ from pathlib import Path
 
 from hdl import path as hdl_root
 
-if __name__ == "__main__":
-    path = Path(__file__).parent.resolve()
+path = Path(__file__).parent.resolve()
+TARGET = "skywater130_demo"
+
+
+def sources():
+    # every file the flow reads, in a stable order (dse.py hashes them)
+    rtl = [path / "day08_top.sv", *sorted(hdl_root.glob("*.sv"))]
+    return [*rtl, path / "day08_top.sdc"]
+
+
+def make_project(parameters=None, *, flow=None):
     design = Design("demo")  # create design object
     design.set_topmodule("day08_top", fileset="rtl")  # set top module
     design.add_file(path / "day08_top.sv", fileset="rtl")  # add input sources
-    design.add_file(list(hdl_root.glob("*.sv")), fileset="rtl")  # add input sources
+    design.add_file(sorted(hdl_root.glob("*.sv")), fileset="rtl")  # add input sources
     design.add_file(path / "day08_top.sdc", fileset="sdc")  # add input sources
+    for name, value in (parameters or {}).items():
+        design.set_param(name, str(value), fileset="rtl")  # top-level overrides
     project = ASIC(design)  # create project
     project.add_fileset(["rtl", "sdc"])  # enable filesets
     skywater130_demo(project)  # load a pre-defined target
+    if flow is not None:
+        project.set_flow(flow)  # e.g. "synflow" from the target
 
     # print(project.getkeys("tool", "yosys"))
     # Enable SystemVerilog support with slang frontend
     project.set("tool", "yosys", "task", "syn_asic", "var", "use_slang", True)
 
     project.option.set_remote(False)  # disable remote execution
+    return project
+
+
+if __name__ == "__main__":
+    project = make_project()
     project.run()  # run compilation
     project.summary()  # print summary
     project.show()  # show layout
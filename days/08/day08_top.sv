@@ -6,6 +6,7 @@ module day08_top #(
     parameter int COORD_BIT_WIDTH = 32,
     parameter int DIMENSIONS = 3,
     parameter int BATCH_SIZE = 2,
+    parameter int FIFO_DEPTH = 256 * BATCH_SIZE,
     parameter int TOP_N = 3,
     localparam type METADATA_TYPE = struct packed {
       logic [INDEX_BIT_WIDTH-1:0] u;
@@ -155,7 +156,7 @@ module day08_top #(
   filtered_fifo #(
       .BIT_WIDTH ($bits(fifo_data_t)),
       .MAX_INPUTS(BATCH_SIZE),
-      .FIFO_DEPTH(512),
+      .FIFO_DEPTH(FIFO_DEPTH),
       .DATA_TYPE (fifo_data_t)
   ) filtered_fifo (
       .clk      (clk),
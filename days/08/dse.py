@@ -0,0 +1,212 @@
+"""Design-space sweep of day08_top: area, timing and model cycles per point.
+
+    python -m days.08.dse -p BATCH_SIZE=2,4,8 -p SORTER_ELEMENTS=10,20
+    python -m days.08.dse -p COORD_BIT_WIDTH=16,24,32 --flow synflow -j 4
+
+Each -p NAME=v1,v2 adds a sweep axis of top-level parameters. Every point is
+built headless in its own worker process and build directory, and the
+metrics of the finished job are cached under .dse_cache keyed on the RTL
+sources, the parameters, the target and the flow, so a rerun only builds
+the points that changed. Cycle counts come from model.simulate on random
+points, so they never need a build.
+"""
+
+import argparse
+import hashlib
+import importlib
+import itertools
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+# integer in dir name breaks standard import
+build = importlib.import_module("days.08.build")
+model = importlib.import_module("days.08.model")
+
+METRICS = ("cellarea", "totalarea", "setupslack", "holdslack", "fmax")
+COLUMNS = ("cellarea", "setupslack", "fmax", "cycles", "pairs_per_cycle")
+
+
+def rtl_hash():
+    digest = hashlib.sha256()
+    for source in build.sources():
+        digest.update(source.name.encode())
+        digest.update(source.read_bytes())
+    return digest.hexdigest()
+
+
+def cache_key(rtl, parameters, flow):
+    key = {
+        "rtl": rtl,
+        "parameters": {name: str(value) for name, value in sorted(parameters.items())},
+        "target": build.TARGET,
+        "flow": flow,
+    }
+    return hashlib.sha256(json.dumps(key, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def collect_metrics(project):
+    # the value recorded by the last node, in execution order, that reports it
+    flow = project.get("option", "flow")
+    order = project.get("flowgraph", flow, field="schema").get_execution_order()
+    metrics = {}
+    for level in order:
+        for step, index in level:
+            for name in METRICS:
+                value = project.get("metric", name, step=step, index=index)
+                if value is not None:
+                    metrics[name] = value
+    return metrics
+
+
+def synthesize(parameters, flow, build_dir):
+    # runs in a worker process; returns the metrics or the error
+    start = time.perf_counter()
+    try:
+        project = build.make_project(parameters, flow=flow)
+        project.option.set_builddir(str(build_dir))
+        project.option.set_jobname("job0")
+        project.option.set_nodisplay(True)
+        project.option.set_quiet(True)
+        history = project.run()
+    except Exception as error:
+        return {"error": f"{type(error).__name__}: {error}"}
+    metrics = collect_metrics(history)
+    metrics["build_seconds"] = round(time.perf_counter() - start, 2)
+    return metrics
+
+
+def estimate(parameters, *, points=None, seed=0):
+    params = {**model.DEFAULT_PARAMETERS, **parameters}
+    n = points or params["MAX_NODE_COUNT"]
+    rng = np.random.default_rng(seed)
+    coords = rng.integers(
+        0,
+        1 << params["COORD_BIT_WIDTH"],
+        size=(n, params["DIMENSIONS"]),
+        dtype=np.uint64,
+    )
+    try:
+        cycles = model.simulate(coords, params).cycles["out_valid"]
+    except ValueError as error:  # e.g. a BATCH_SIZE the FIFO cannot take
+        return {"model_error": str(error)}
+    return {"cycles": cycles, "pairs_per_cycle": n * (n - 1) / 2 / max(cycles, 1)}
+
+
+def sweep(
+    grid,
+    *,
+    flow=None,
+    jobs=None,
+    work_dir,
+    cache_dir,
+    force=False,
+    points=None,
+    seed=0,
+):
+    rtl = rtl_hash()
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    rows = []
+    todo = []
+    for parameters in grid:
+        key = cache_key(rtl, parameters, flow)
+        cached = cache_dir / f"{key}.json"
+        row = {"parameters": parameters, "key": key}
+        if cached.exists() and not force:
+            row.update(json.loads(cached.read_text()), cached=True)
+        else:
+            todo.append(row)
+        rows.append(row)
+    print(f"{len(rows)} points, {len(rows) - len(todo)} cached, {len(todo)} to build")
+
+    with ProcessPoolExecutor(jobs) as pool:
+        futures = {
+            pool.submit(synthesize, row["parameters"], flow, work_dir / row["key"]): row
+            for row in todo
+        }
+        for future, row in futures.items():
+            metrics = future.result()
+            row.update(metrics, cached=False)
+            if "error" not in metrics:  # failures are retried next time
+                (cache_dir / f"{row['key']}.json").write_text(json.dumps(metrics))
+
+    for row in rows:
+        params = {name: int(value) for name, value in row["parameters"].items()}
+        row.update(estimate(params, points=points, seed=seed))
+        if row.get("fmax") and "cycles" in row:
+            row["seconds_at_fmax"] = row["cycles"] / row["fmax"]
+    return rows
+
+
+def print_table(rows, axes):
+    header = [*axes, *COLUMNS, "source"]
+    lines = [header]
+    for row in rows:
+        cells = [str(row["parameters"][name]) for name in axes]
+        for column in COLUMNS:
+            value = row.get(column)
+            cells.append("-" if value is None else f"{value:.4g}")
+        source = "cache" if row["cached"] else "built"
+        cells.append("error" if "error" in row else source)
+        lines.append(cells)
+    widths = [max(len(line[i]) for line in lines) for i in range(len(header))]
+    for line in lines:
+        print("  ".join(cell.rjust(width) for cell, width in zip(line, widths)))
+    for row in rows:
+        for error in ("error", "model_error"):
+            if error in row:
+                print(f"{row['key']} {row['parameters']}: {row[error]}")
+
+
+def main():
+    here = Path(__file__).parent
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "-p",
+        "--param",
+        action="append",
+        default=[],
+        metavar="NAME=V1,V2",
+        help="sweep a top-level parameter",
+    )
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count())
+    parser.add_argument("--flow", help="flow of the target to run (default: asicflow)")
+    parser.add_argument("--points", type=int, help="model input size (MAX_NODE_COUNT)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--work-dir", type=Path, default=here / "dse_build")
+    parser.add_argument("--cache-dir", type=Path, default=here / ".dse_cache")
+    parser.add_argument("--force", action="store_true", help="rebuild cached points")
+    parser.add_argument("--json", type=Path, help="also write the table here")
+    args = parser.parse_args()
+
+    axes = []
+    for spec in args.param:
+        name, _, values = spec.partition("=")
+        axes.append([(name, v) for v in values.split(",")])
+    grid = [dict(combo) for combo in itertools.product(*axes)]
+
+    start = time.perf_counter()
+    rows = sweep(
+        grid,
+        flow=args.flow,
+        jobs=args.jobs,
+        work_dir=args.work_dir.resolve(),
+        cache_dir=args.cache_dir,
+        force=args.force,
+        points=args.points,
+        seed=args.seed,
+    )
+    print_table(rows, [axis[0][0] for axis in axes])
+    print(f"done in {time.perf_counter() - start:.1f}s")
+    if args.json:
+        args.json.write_text(json.dumps(rows, indent=2))
+    return 0 if not any("error" in row for row in rows) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,331 @@
+"""Transaction-level model of day08_top.
+
+Follows coord_distance -> filtered_fifo -> systolic_sorter -> union_find with
+the RTL's widths and handshakes, assuming a source that presents a new batch
+every cycle `in_ready` is high (cycle 0 is the first edge after reset).
+
+The sorter is modelled as sequential stable insertion: every moving value
+advances one slot per cycle, so slot i sees insertions in arrival order and
+the array ends up as the ELEMENTS smallest by (distance, arrival). The
+`largest` threshold seen by the filter lags insertion by ELEMENTS cycles.
+Stretches where nothing is in flight are skipped with a vectorised search
+over per-batch minimum distances.
+"""
+
+import bisect
+import heapq
+from collections import deque
+from dataclasses import dataclass, field
+
+import numpy as np
+
+DEFAULT_PARAMETERS = {
+    "MAX_NODE_COUNT": 10,
+    "COORD_BIT_WIDTH": 32,
+    "DIMENSIONS": 3,
+    "BATCH_SIZE": 2,
+    "TOP_N": 3,
+}
+FIND_HOPS_PER_CYCLE = 6  # union_find resolves s0..s5 each cycle
+
+
+def clog2(x):
+    return max(0, (x - 1).bit_length())
+
+
+@dataclass
+class ModelResult:
+    pairs: list  # (u, v) in the order the sorter shifts them out
+    distances: list
+    top_sizes: list
+    top_roots: list
+    top_product: int
+    cycles: dict = field(default_factory=dict)
+
+
+def stream_items(coords, batch_size):
+    # the testbench stream: line i carries indices i..n-1, padded to full batches
+    n = coords.shape[0]
+    lengths = n - np.arange(n)
+    padded = -(-lengths // batch_size) * batch_size
+    line = np.repeat(np.arange(n), padded)
+    line_start = np.repeat(np.cumsum(padded) - padded, padded)
+    offset = np.arange(int(padded.sum())) - line_start
+    valid = offset < np.repeat(lengths, padded)
+    v = np.where(valid, line + offset, 0)
+    return line, v, valid
+
+
+def _distances(coords, u, v, coord_bits, distance_bits):
+    # coord_distance: per-dimension signed diff, squared, summed, truncated
+    coords = coords.astype(np.uint64) & np.uint64((1 << coord_bits) - 1)
+    if 3 * (1 << coord_bits) ** 2 < 2**64:
+        X = coords.astype(np.int64)
+        dist = np.zeros(len(u), dtype=np.int64)
+        for d in range(X.shape[1]):
+            diff = X[u, d] - X[v, d]
+            dist += diff * diff
+        return dist.astype(np.uint64) & np.uint64((1 << distance_bits) - 1)
+    X = coords.astype(object)
+    dist = sum((X[u, d] - X[v, d]) ** 2 for d in range(X.shape[1]))
+    return dist % (1 << distance_bits)
+
+
+def _union_find(pairs, node_count, index_bits):
+    # union_find state machine: cycles per edge and the final node table
+    mask = (1 << index_bits) - 1
+    parent = list(range(node_count))
+    size = [1] * node_count
+    edge_cycles = []
+    find_cycles = compress_cycles = 0
+
+    def hops(x):
+        d = 0
+        while parent[x] != x:
+            x = parent[x]
+            d += 1
+        return x, d
+
+    for u, v in pairs:
+        root_v, depth_v = hops(v)
+        cur = v
+        while cur != root_v:
+            parent[cur], cur = root_v, parent[cur]
+        # FINDROOT_U goes straight to MERGE, u's path is never compressed
+        root_u, depth_u = hops(u)
+
+        fv = depth_v // FIND_HOPS_PER_CYCLE + 1
+        fu = depth_u // FIND_HOPS_PER_CYCLE + 1
+        find_cycles += fv + fu
+        compress_cycles += depth_v + 1
+        edge_cycles.append(fv + depth_v + 1 + fu + 1)  # + MERGE
+
+        if root_u != root_v:
+            if size[root_u] < size[root_v]:
+                parent[root_u] = root_v
+                size[root_v] = (size[root_v] + size[root_u]) & mask
+            else:
+                parent[root_v] = root_u
+                size[root_u] = (size[root_u] + size[root_v]) & mask
+
+    return parent, size, edge_cycles, find_cycles, compress_cycles
+
+
+def simulate(coords, parameters=None):
+    params = {**DEFAULT_PARAMETERS, **(parameters or {})}
+    node_count = params["MAX_NODE_COUNT"]
+    elements = params.get("SORTER_ELEMENTS", node_count)
+    batch_size = params["BATCH_SIZE"]
+    top_n = params["TOP_N"]
+    coord_bits = params["COORD_BIT_WIDTH"]
+    lane_depth = params.get("FIFO_DEPTH", 256 * batch_size) // batch_size
+    index_bits = clog2(node_count)
+    distance_bits = 2 * coord_bits + clog2(3)
+
+    n = coords.shape[0]
+    if n > node_count:
+        raise ValueError(f"{n} points do not fit MAX_NODE_COUNT={node_count}")
+    if coords.shape[1] != params["DIMENSIONS"]:
+        raise ValueError("coords do not match DIMENSIONS")
+    if batch_size & (batch_size - 1):
+        raise ValueError("filtered_fifo lane pointers wrap at a power of two")
+
+    # -- stimulus, vectorised up front
+    line, v, valid = stream_items(coords, batch_size)
+    dist = _distances(coords, line, v, coord_bits, distance_bits)
+    eligible = valid & (line != v)
+    n_batches = len(line) // batch_size
+    big = np.iinfo(np.uint64).max if dist.dtype != object else None
+    if big is not None:
+        batch_min = np.where(eligible, dist, big).reshape(n_batches, batch_size).min(1)
+    else:
+        batch_min = None
+    batch_dist = dist.reshape(n_batches, batch_size).tolist()
+    batch_eligible = eligible.reshape(n_batches, batch_size).tolist()
+    batch_u = line.reshape(n_batches, batch_size)[:, 0].tolist()
+    batch_v = v.reshape(n_batches, batch_size).tolist()
+
+    # -- distance + filtered fifo + sorter insertion, cycle by cycle
+    lane_count = [0] * batch_size
+    write_lane = read_lane = 0
+    fifo = deque()  # (write edge, dist, u, v, last)
+    in_flight = deque()  # (insert edge, dist, seq) not yet visible at slot E-1
+    held = []  # max-heap of the `elements` smallest matured (dist, seq)
+    tokens = []  # every sorter insertion: (dist, seq, u, v)
+    coord_reg = None  # batch index held in coord_distance, evaluated next edge
+    src = 0
+    c = 0
+    stall_cycles = 0
+    max_fifo = 0
+    last_edge = None  # edge at which the `last` marker enters the sorter
+    pending_last_pulse = None  # cycle from which last_only_pulse is visible
+    first_accept = last_accept = None
+
+    while True:
+        while in_flight and in_flight[0][0] <= c - elements:
+            _, d, seq = in_flight.popleft()
+            heapq.heappush(held, (-d, -seq))
+            if len(held) > elements:
+                heapq.heappop(held)
+        threshold = -held[0][0] if len(held) == elements else None
+        ready = max(lane_count) < lane_depth - 1
+
+        # nothing in flight: jump over batches that the threshold rejects
+        if (
+            ready
+            and coord_reg is not None
+            and threshold is not None
+            and not fifo
+            and not in_flight
+            and batch_min is not None
+        ):
+            ahead = np.flatnonzero(batch_min[coord_reg:] < threshold)
+            skip = int(ahead[0]) if len(ahead) else n_batches - 1 - coord_reg
+            if skip:
+                c += skip
+                coord_reg += skip
+                src = coord_reg + 1
+                last_accept = c - 1
+                continue
+
+        popped = None
+        if fifo and fifo[0][0] <= c - 1:
+            popped = fifo.popleft()
+        elif pending_last_pulse is not None and pending_last_pulse <= c and not fifo:
+            last_edge = c
+            pending_last_pulse = None
+
+        if ready:
+            if coord_reg is not None:
+                b = coord_reg
+                kept = [
+                    (batch_dist[b][i], batch_u[b], batch_v[b][i])
+                    for i in range(batch_size)
+                    if batch_eligible[b][i]
+                    and (threshold is None or batch_dist[b][i] < threshold)
+                ]
+                is_last = b == n_batches - 1
+                for idx, (d, u, vv) in enumerate(kept):
+                    fifo.append((c, d, u, vv, is_last and idx == len(kept) - 1))
+                    lane_count[write_lane] += 1
+                    write_lane = (write_lane + 1) % batch_size
+                if is_last and not kept:
+                    pending_last_pulse = c + 1
+            if src < n_batches:
+                coord_reg = src
+                src += 1
+                last_accept = c
+                if first_accept is None:
+                    first_accept = c
+            else:
+                coord_reg = None
+        elif src < n_batches:
+            stall_cycles += 1
+
+        if popped is not None:
+            _, d, u, vv, last = popped
+            lane_count[read_lane] -= 1
+            read_lane = (read_lane + 1) % batch_size
+            in_flight.append((c, d, len(tokens)))
+            tokens.append((d, len(tokens), u, vv))
+            if last:
+                last_edge = c
+
+        max_fifo = max(max_fifo, len(fifo))
+        c += 1
+        if last_edge is not None:
+            break
+        if n_batches == 0:
+            last_edge = c
+            break
+
+    # -- shift out: largest first, only when every slot is filled
+    kept = sorted(tokens)[:elements]
+    if len(kept) < elements:
+        kept = []  # slot ELEMENTS-1 never becomes valid, SHIFTOUT exits at once
+    shifted = list(reversed(kept))
+    pairs = [(u, vv) for _, _, u, vv in shifted]
+
+    shiftout_start = last_edge + elements + 2
+    parent, size, edge_cycles, find_cycles, compress_cycles = _union_find(
+        pairs, node_count, index_bits
+    )
+    busy = []  # union_find cycles outside READIN, inclusive
+    accept = shiftout_start
+    for cycles in edge_cycles:
+        busy.append((accept + 1, accept + cycles))
+        accept += cycles + 1
+    uf_done = busy[-1][1] if busy else shiftout_start
+
+    # -- top-level sweep restarts every MAX_NODE_COUNT + 1 cycles while idle
+    def uf_idle(cycle):
+        i = bisect.bisect_right(busy, (cycle, float("inf"))) - 1
+        if i >= 0 and busy[i][0] <= cycle <= busy[i][1]:
+            return busy[i][1] + 1
+        return cycle
+
+    start = 0
+    while start < uf_done:
+        start = uf_idle(start + node_count + 1)
+    done = start + node_count + 1
+
+    top = [(0, 0)] * top_n  # (size, root); only strictly larger sizes displace
+    for node in range(node_count):
+        if parent[node] != node:
+            continue
+        for d, (s, _) in enumerate(top):
+            if size[node] > s:
+                top.insert(d, (size[node], node))
+                del top[top_n:]
+                break
+    top_sizes = [s for s, _ in top]
+    product = 1
+    for s in top_sizes:
+        product *= s
+
+    return ModelResult(
+        pairs=pairs,
+        distances=[int(d) for d, _, _, _ in shifted],
+        top_sizes=top_sizes,
+        top_roots=[r for _, r in top],
+        top_product=product & ((1 << (index_bits * top_n)) - 1),
+        cycles={
+            "first_accept": first_accept,
+            "last_accept": last_accept,
+            "input_stall": stall_cycles,
+            "fifo_peak": max_fifo,
+            "sorter_inserts": len(tokens),
+            "sorter_last": last_edge,
+            "shiftout_start": shiftout_start,
+            "union_find_edges": len(edge_cycles),
+            "union_find_busy": sum(edge_cycles),
+            "union_find_find": find_cycles,
+            "union_find_compress": compress_cycles,
+            "union_find_done": uf_done,
+            "out_valid": done,
+        },
+    )
+
+
+if __name__ == "__main__":
+    import itertools
+    import time
+
+    rng = np.random.default_rng(2011504658)
+    coords = rng.integers(0, (1 << 24) - 1, size=(1000, 3), dtype=np.uint64)
+    for batch_size, elements in itertools.product([2, 4, 8], [250, 1000]):
+        t = time.perf_counter()
+        result = simulate(
+            coords,
+            {
+                "COORD_BIT_WIDTH": 24,
+                "BATCH_SIZE": batch_size,
+                "SORTER_ELEMENTS": elements,
+                "MAX_NODE_COUNT": 1000,
+            },
+        )
+        print(
+            f"BATCH_SIZE={batch_size} SORTER_ELEMENTS={elements}: "
+            f"sizes {result.top_sizes} done @ {result.cycles['out_valid']} cycles "
+            f"({time.perf_counter() - t:.2f}s)"
+        )
@@ -0,0 +1,51 @@
+import importlib
+
+import numpy as np
+
+# integer in dir name breaks standard import
+day08 = importlib.import_module("days.08.attempt")
+
+
+def test_grid_matches_tiled_on_far_apart_clusters():
+    # k exceeds the pairs inside each cluster, so the radius has to grow to
+    # the full span of uint32 coordinates
+    rng = np.random.default_rng(0)
+    for _ in range(20):
+        near = rng.integers(0, 100, size=(20, 3), dtype=np.uint32)
+        far = rng.integers(2**31 - 100, 2**31, size=(20, 3), dtype=np.uint32)
+        X = np.concatenate([near, far])
+        k = int(rng.integers(200, 700))
+        pairs, dist = day08.top_k_closest_pairs_grid(X, k)
+        expected_pairs, expected_dist = day08.top_k_closest_pairs_l2(X, k)
+        np.testing.assert_array_equal(dist, expected_dist)
+        np.testing.assert_array_equal(pairs, expected_pairs)
+
+
+def test_grid_radius_ignores_a_far_outlier():
+    # one point at 2**31 makes the bounding box enormous; the starting radius
+    # must still shrink to the cluster instead of pairing up everything
+    rng = np.random.default_rng(1)
+    cluster = rng.integers(0, 1000, size=(3000, 3), dtype=np.uint32)
+    X = np.concatenate([cluster, np.full((1, 3), 2**31, dtype=np.uint32)])
+    pairs, dist = day08.top_k_closest_pairs_grid(X, 1000)
+    expected_pairs, expected_dist = day08.top_k_closest_pairs_l2(X, 1000)
+    np.testing.assert_array_equal(dist, expected_dist)
+    np.testing.assert_array_equal(pairs, expected_pairs)
+
+    # too many points for every pair to fit in memory
+    cluster = rng.integers(0, 1000, size=(200_000, 3), dtype=np.uint32)
+    X = np.concatenate([cluster, np.full((1, 3), 2**31, dtype=np.uint32)])
+    pairs, dist = day08.top_k_closest_pairs_grid(X, 1000)
+    expected_pairs, expected_dist = day08.top_k_closest_pairs_grid(cluster, 1000)
+    np.testing.assert_array_equal(dist, expected_dist)
+    np.testing.assert_array_equal(pairs, expected_pairs)
+
+
+def test_kruskal_checkpoints_below_one_are_skipped():
+    rng = np.random.default_rng(2)
+    X = rng.integers(0, 1000, size=(30, 3), dtype=np.uint32)
+    _, _, expected = day08.kruskal_until_connected(X, checkpoints=[5])
+    for checkpoints in ([0, 5], [-1, 5]):
+        _, _, history = day08.kruskal_until_connected(X, checkpoints=checkpoints)
+        assert history.keys() == expected.keys()
+        np.testing.assert_array_equal(history[5], expected[5])
@@ -4,17 +4,20 @@ from cocotb.triggers import ClockCycles, RisingEdge, ReadOnly
 import numpy as np
 import importlib
 
-from sim.lib import build_and_run_sim, reset
+from sim.lib import build_and_run_sim, reset, sim_param
+from sim.lib.monitors import Handshake, PerfMonitor, State
 
 # integer in dir name breaks standard import
 attempt = importlib.import_module("days.08.attempt")
+model = importlib.import_module("days.08.model")
 solve_coords = attempt.solve_coords
 load_coords = attempt.load_coords
 
 
 DIMENSIONS = 3
-BATCH_SIZE = 4
-TOP_N = 3
+BATCH_SIZE = sim_param("BATCH_SIZE", 4)
+FIFO_DEPTH = sim_param("FIFO_DEPTH", 256 * BATCH_SIZE)
+TOP_N = sim_param("TOP_N", 3)
 
 if False:
     COORD_BIT_WIDTH = 32
@@ -23,9 +26,9 @@ if False:
     assert MAX_NODE_COUNT == 1000
     SORTER_ELEMENTS = MAX_NODE_COUNT
 else:
-    COORD_BIT_WIDTH = 24
-    MAX_NODE_COUNT = 1000
-    SORTER_ELEMENTS = MAX_NODE_COUNT  # to match AoC problem
+    COORD_BIT_WIDTH = sim_param("COORD_BIT_WIDTH", 24)
+    MAX_NODE_COUNT = sim_param("MAX_NODE_COUNT", 1000)
+    SORTER_ELEMENTS = sim_param("SORTER_ELEMENTS", MAX_NODE_COUNT)  # to match AoC
 
     def generate_coords(count):
         # seed = random.randint(0, 2**32 - 1)
@@ -37,6 +40,25 @@ else:
         )
     coords = generate_coords(MAX_NODE_COUNT)
 
+PARAMETERS = {
+    "COORD_BIT_WIDTH": COORD_BIT_WIDTH,
+    "DIMENSIONS": DIMENSIONS,
+    "BATCH_SIZE": BATCH_SIZE,
+    "FIFO_DEPTH": FIFO_DEPTH,
+    "TOP_N": TOP_N,
+    "SORTER_ELEMENTS": SORTER_ELEMENTS,
+    "MAX_NODE_COUNT": MAX_NODE_COUNT,
+}
+SORTER_STATES = ["RUN", "SHIFTOUT"]
+UNION_FIND_STATES = [
+    "READIN",
+    "FINDROOT_V",
+    "COMPRESS_V",
+    "FINDROOT_U",
+    "COMPRESS_U",
+    "MERGE",
+]
+
 
 def unpack_two_packed_values(sig):
     meta_value = int(sig.value)
@@ -48,6 +70,22 @@ def unpack_two_packed_values(sig):
     return u, v
 
 
+def pipeline_monitor(dut):
+    return PerfMonitor(
+        dut.clk,
+        [
+            # in_ready low with a batch presented: filtered_fifo backpressure
+            Handshake("input", dut.batch_valid, dut.in_ready),
+            Handshake("distance", dut.coord_out_valid, dut.fifo_ready),
+            Handshake("fifo_out", dut.fifo_out_valid),
+            Handshake("sorter_out", dut.sorter_out_valid, dut.uf_in_ready),
+            State("sorter", dut.systolic_sorter.state, SORTER_STATES),
+            State("union_find", dut.union_find.state, UNION_FIND_STATES),
+        ],
+        parameters=PARAMETERS,
+    )
+
+
 def diff_pairs(actual_pairs, expected_pairs):
     actual_set = {p: i for i, p in enumerate(actual_pairs)}
     expected_set = {p: i for i, p in enumerate(expected_pairs)}
@@ -56,34 +94,44 @@ def diff_pairs(actual_pairs, expected_pairs):
     return extras, missing
 
 
-def batch_indices(indices, batch_size, pad_value):
-    if len(indices) % batch_size != 0:
-        padding_amount = batch_size - (len(indices) % batch_size)
-        indices = indices + [pad_value] * padding_amount
-    return [indices[i : i + batch_size] for i in range(0, len(indices), batch_size)]
+def build_stimulus(coords, batch_size):
+    # every batch of the stream, prepared up front: valid masks packed into
+    # ints, padding lanes pointing at index 0, line/stream end flags
+    line, indices, valid = model.stream_items(coords, batch_size)
+    n_batches = len(line) // batch_size
+    indices = indices.reshape(n_batches, batch_size)
+    valid_bits = valid.reshape(n_batches, batch_size) << np.arange(batch_size)
+    batch_line = line[::batch_size]
+    line_end = np.append(batch_line[1:] != batch_line[:-1], True)
+    stream_end = np.zeros(n_batches, dtype=bool)
+    stream_end[-1:] = True
+    return zip(
+        valid_bits.sum(axis=1).tolist(),
+        line_end.astype(int).tolist(),
+        stream_end.astype(int).tolist(),
+        coords[indices].tolist(),
+        indices.tolist(),
+    )
 
 
 async def drive_stream(dut, coords):
-    n = coords.shape[0]
-    for i in range(n):
-        line_indices = list(range(i, n))
-        batches = batch_indices(line_indices, BATCH_SIZE, pad_value=None)
-        for j, batch in enumerate(batches):
-            while not dut.in_ready.value:
-                await ClockCycles(dut.clk, 1)
-            batch_valid_bits = 0
-            for bit_idx, value in enumerate(batch):
-                if value is None:
-                    batch[bit_idx] = 0
-                else:
-                    batch_valid_bits |= 1 << bit_idx
-            dut.batch_valid.value = batch_valid_bits
-
-            dut.batch_line_end.value = (line_end := int(j == (len(batches) - 1)))
-            dut.batch_stream_end.value = int((i == (n - 1)) and line_end)
-            dut.batch_coords.value = [coords[idx].tolist() for idx in batch]
-            dut.batch_indices.value = batch
-            await ClockCycles(dut.clk, 1)
+    stimulus = build_stimulus(coords, BATCH_SIZE)
+    edge = RisingEdge(dut.clk)
+    in_ready = dut.in_ready
+    prev_valid = prev_line_end = prev_stream_end = None
+    for valid, line_end, stream_end, batch_coords, indices in stimulus:
+        while not in_ready.value:
+            await edge
+        # only touch the flags when they change, they are mostly constant
+        if valid != prev_valid:
+            dut.batch_valid.value = prev_valid = valid
+        if line_end != prev_line_end:
+            dut.batch_line_end.value = prev_line_end = line_end
+        if stream_end != prev_stream_end:
+            dut.batch_stream_end.value = prev_stream_end = stream_end
+        dut.batch_coords.value = batch_coords
+        dut.batch_indices.value = indices
+        await edge
     dut.batch_valid.value = 0
     dut.batch_line_end.value = 0
     dut.batch_stream_end.value = 0
@@ -95,63 +143,77 @@ async def test_a(dut):
     cocotb.start_soon(Clock(dut.clk, 10, unit="ns").start())
 
     await reset(dut.clk, dut.rst, 2)
+    perf = pipeline_monitor(dut)
+    perf.start()
+    perf.mark("start")
+    # the report also covers failing runs, up to the failure
+    try:
+
+        for idx in [1, 2, 4]:
+            print(f"Coord {idx}: {coords[idx]}")
+
+        for idx in [(1, 4), (2, 4)]:
+            diff = coords[idx[0]] - coords[idx[1]]
+            dist2 = np.sum(diff**2)
+            print(f"Distance^2 between {idx[0]} and {idx[1]}: {dist2}")
+
+        expected_sizes, expected_product, expected_pairs, _ = solve_coords(
+            coords,
+            k=SORTER_ELEMENTS,
+            m=TOP_N,
+        )
 
-    for idx in [1, 2, 4]:
-        print(f"Coord {idx}: {coords[idx]}")
+        await drive_stream(dut, coords)
+        perf.mark("input_done")
+        dut._log.info("All input driven")
 
-    for idx in [(1, 4), (2, 4)]:
-        diff = coords[idx[0]] - coords[idx[1]]
-        dist2 = np.sum(diff**2)
-        print(f"Distance^2 between {idx[0]} and {idx[1]}: {dist2}")
+        dut._log.info("Waiting for sorter output to exhaust")
+        await RisingEdge(dut.sorter_out_valid)
+        perf.mark("shiftout_start")
 
-    expected_sizes, expected_product, expected_pairs, _ = solve_coords(
-        coords,
-        k=SORTER_ELEMENTS,
-        m=TOP_N,
-    )
+        top_k_pairs = []
+        while dut.sorter_out_valid.value:
+            while not dut.uf_in_ready.value:
+                await RisingEdge(dut.uf_in_ready)
+            await ReadOnly()
 
-    await drive_stream(dut, coords)
-    dut._log.info("All input driven")
-
-    dut._log.info("Waiting for sorter output to exhaust")
-    await RisingEdge(dut.sorter_out_valid)
-
-    top_k_pairs = []
-    while dut.sorter_out_valid.value:
-        while not dut.uf_in_ready.value:
-            await RisingEdge(dut.uf_in_ready)
-        await ReadOnly()
-
-        top_k_pairs.append(unpack_two_packed_values(dut.sorter_out_metadata))
-        await ClockCycles(dut.clk, 1)
-        await ReadOnly()
-
-    expected_pairs = [tuple(map(int, pair)) for pair in expected_pairs]
-    extras, missing = diff_pairs(top_k_pairs, list(reversed(expected_pairs)))
-    if extras:
-        dut._log.warning(f"Extra pairs in top_k_pairs at indices: {extras}")
-    assert not missing, f"Missing expected pairs at indices: {missing}"
-
-    dut._log.info("Sorter output finished, waiting for top output valid")
-    for _ in range(2):
-        # exhaust stale half-accumulation so wait for second valid
-        await RisingEdge(dut.out_valid)
-
-    dut._log.info("Top output valid, sampling results")
-    got_sizes = [int(dut.top_sizes[i].value) for i in range(TOP_N)]
-    got_product = int(dut.top_product.value)
-
-    expected_sizes = expected_sizes.tolist()
-    await ClockCycles(dut.clk, 100)  # FIXME: tmp to extend
-    assert len(expected_sizes) == TOP_N, (
-        f"Expected sizes length mismatch: expected {TOP_N}, got {len(expected_sizes)}"
-    )
-    assert got_sizes == expected_sizes, (
-        f"Top sizes mismatch: expected {expected_sizes}, got {got_sizes}"
-    )
-    assert got_product == expected_product, (
-        f"Top product mismatch: expected {expected_product}, got {got_product}"
-    )
+            top_k_pairs.append(unpack_two_packed_values(dut.sorter_out_metadata))
+            await ClockCycles(dut.clk, 1)
+            await ReadOnly()
+
+        perf.mark("shiftout_done")
+
+        expected_pairs = [tuple(map(int, pair)) for pair in expected_pairs]
+        extras, missing = diff_pairs(top_k_pairs, list(reversed(expected_pairs)))
+        if extras:
+            dut._log.warning(f"Extra pairs in top_k_pairs at indices: {extras}")
+        assert not missing, f"Missing expected pairs at indices: {missing}"
+
+        dut._log.info("Sorter output finished, waiting for top output valid")
+        for _ in range(2):
+            # exhaust stale half-accumulation so wait for second valid
+            await RisingEdge(dut.out_valid)
+        perf.mark("out_valid")
+        perf.stop()
+
+        dut._log.info("Top output valid, sampling results")
+        got_sizes = [int(dut.top_sizes[i].value) for i in range(TOP_N)]
+        got_product = int(dut.top_product.value)
+
+        expected_sizes = expected_sizes.tolist()
+        await ClockCycles(dut.clk, 100)  # FIXME: tmp to extend
+        assert len(expected_sizes) == TOP_N, (
+            f"Expected sizes length mismatch: expected {TOP_N}, "
+            f"got {len(expected_sizes)}"
+        )
+        assert got_sizes == expected_sizes, (
+            f"Top sizes mismatch: expected {expected_sizes}, got {got_sizes}"
+        )
+        assert got_product == expected_product, (
+            f"Top product mismatch: expected {expected_product}, got {got_product}"
+        )
+    finally:
+        dut._log.info(f"Performance report written to {perf.write()}")
 
 
 if __name__ == "__main__":
@@ -159,12 +221,5 @@ if __name__ == "__main__":
         __file__,
         hdl_toplevel="day08_top",
         additional_sources=["days/08/day08_top.sv"],
-        parameters={
-            "COORD_BIT_WIDTH": COORD_BIT_WIDTH,
-            "DIMENSIONS": DIMENSIONS,
-            "BATCH_SIZE": BATCH_SIZE,
-            "TOP_N": TOP_N,
-            "SORTER_ELEMENTS": SORTER_ELEMENTS,
-            "MAX_NODE_COUNT": MAX_NODE_COUNT,
-        },
+        parameters=PARAMETERS,
     )
@@ -1,4 +1,6 @@
-from days.lib.input import load_input
+import numpy as np
+
+from days.lib.input import iter_input, load_cached
 
 
 def count_routes_forward(
@@ -38,29 +40,592 @@ def count_routes_forward(
 
     return total_routes
 
-def load():
+def csr_from_children(node_children):
+    # CSR adjacency: children of names[i] are names[indices[indptr[i]:indptr[i+1]]]
+    names = sorted(set(node_children).union(*node_children.values()))
+    index = {name: i for i, name in enumerate(names)}
+    indptr = np.zeros(len(names) + 1, dtype=np.int64)
+    indptr[1:] = np.cumsum([len(node_children.get(name, ())) for name in names])
+    indices = np.array(
+        [index[child] for name in names for child in node_children.get(name, ())],
+        dtype=np.int64,
+    )
+    return {"names": np.array(names, dtype=str), "indptr": indptr, "indices": indices}
+
+
+def parse_graph(script_file):
     node_children = {}
-    for line in load_input(__file__):
+    for line in iter_input(script_file):
         node, connected_to = line.split(": ")
-        children = connected_to.split(" ")
-        node_children[node] = set(child.strip() for child in children)
-    return node_children
+        node_children[node] = list(dict.fromkeys(connected_to.split()))
+    return csr_from_children(node_children)
+
+
+def load_graph():
+    return load_cached(__file__, "graph", parse_graph)
+
+
+def load():
+    graph = load_graph()
+    names = graph["names"].tolist()
+    indptr = graph["indptr"].tolist()
+    indices = graph["indices"].tolist()
+    return {
+        name: {names[j] for j in indices[indptr[i] : indptr[i + 1]]}
+        for i, name in enumerate(names)
+        if indptr[i] != indptr[i + 1]
+    }
+
+
+def node_id(names: np.ndarray, name: str) -> int | None:
+    # names are sorted, so interning is a binary search
+    i = int(np.searchsorted(names, name))
+    return i if i < len(names) and names[i] == name else None
+
+
+def resolve_query(names: np.ndarray, node_from: str, node_to: str, needs=None):
+    """Node ids `(source, target, required)` of a route query.
+
+    Returns the count itself when no search is needed: 1 or 0 when
+    `node_from` is `node_to`, 0 when a named node is not in the graph.
+    """
+    needs = set(needs or ()) - {node_from, node_to}
+    if node_from == node_to:
+        return 0 if needs else 1
+    source = node_id(names, node_from)
+    target = node_id(names, node_to)
+    required = [node_id(names, name) for name in sorted(needs)]
+    if source is None or target is None or None in required:
+        return 0
+    return source, target, required
+
+
+def reverse_csr(indptr: np.ndarray, indices: np.ndarray):
+    n = len(indptr) - 1
+    parents = np.repeat(np.arange(n), np.diff(indptr))
+    order = np.argsort(indices, kind="stable")
+    rindptr = np.zeros(n + 1, dtype=np.int64)
+    rindptr[1:] = np.cumsum(np.bincount(indices, minlength=n))
+    return rindptr, parents[order]
+
+
+def reachable(
+    indptr: np.ndarray, indices: np.ndarray, start: int, stop=()
+) -> np.ndarray:
+    # nodes reachable from `start` without leaving any node in `stop`
+    ptr = indptr.tolist()
+    nbr = indices.tolist()
+    seen = bytearray(len(ptr) - 1)
+    seen[start] = 1
+    stack = [start]
+    while stack:
+        u = stack.pop()
+        if u in stop:
+            continue
+        for v in nbr[ptr[u] : ptr[u + 1]]:
+            if not seen[v]:
+                seen[v] = 1
+                stack.append(v)
+    return np.frombuffer(seen, dtype=bool)
+
+
+def _route_mask(graph, reverse, source: int, target: int, avoid=None) -> np.ndarray:
+    # the nodes on some `source` -> `target` route that never meets `avoid`
+    stop = (target,) if avoid is None else (target, avoid)
+    on_route = reachable(graph["indptr"], graph["indices"], source, stop=stop)
+    on_route &= reachable(*reverse, target, stop=() if avoid is None else (avoid,))
+    if avoid is not None:
+        on_route[avoid] = False
+    return on_route
+
+
+def _topological(graph, on_route: np.ndarray, source: int, target: int) -> list[int]:
+    # Kahn over the `on_route` nodes, leaving out the edges out of `target`
+    indptr, indices = graph["indptr"], graph["indices"]
+    n = len(indptr) - 1
+    parents = np.repeat(np.arange(n), np.diff(indptr))
+    kept = on_route[parents] & on_route[indices] & (parents != target)
+    indegree = np.bincount(indices[kept], minlength=n).tolist()
+    if indegree[source]:
+        raise ValueError("a route passes through a cycle")
+
+    ptr = indptr.tolist()
+    nbr = indices.tolist()
+    on = on_route.tolist()
+    order = []
+    ready = [source]
+    while ready:
+        u = ready.pop()
+        order.append(u)
+        if u == target:
+            continue
+        for v in nbr[ptr[u] : ptr[u + 1]]:
+            if on[v]:
+                indegree[v] -= 1
+                if not indegree[v]:
+                    ready.append(v)
+    if len(order) != int(on_route.sum()):
+        raise ValueError("a route passes through a cycle")
+    return order
+
+
+def route_order(graph, source: int, target: int) -> list[int]:
+    """Topological order of the nodes on some `source` -> `target` route.
+
+    Only nodes reachable from `source` that also reach `target` matter, and
+    a route ends at `target`, so the edges out of it never count. A cycle
+    elsewhere is harmless; a cycle among the rest means infinitely many
+    routes and raises ValueError. `target` comes last.
+    """
+    reverse = reverse_csr(graph["indptr"], graph["indices"])
+    on_route = _route_mask(graph, reverse, source, target)
+    if not on_route[source]:
+        return []
+    return _topological(graph, on_route, source, target)
+
+
+def _needs_segments(graph, source, target, required):
+    """`(a, b, on_route)` per leg of the routes through every required node.
+
+    A route meets the required nodes in the order they reach each other
+    (without passing `target`, where routes end), so the legs run between
+    consecutive ones and avoid `target` until the last. Returns [] when no
+    route meets them all; only the nodes of the legs are checked for cycles
+    later, so a cycle off those routes is harmless. Two required nodes that
+    reach each other, with a route through both, loop: ValueError.
+    """
+    indptr, indices = graph["indptr"], graph["indices"]
+    reverse = reverse_csr(indptr, indices)
+    reach = {r: reachable(indptr, indices, r, stop=(target,)) for r in required}
+    later = {r: sum(bool(reach[r][q]) for q in required if q != r) for r in required}
+    chain = [source, *sorted(required, key=later.__getitem__, reverse=True), target]
+
+    segments = []
+    for a, b in zip(chain, chain[1:]):
+        on_route = _route_mask(graph, reverse, a, b, None if b == target else target)
+        if not on_route[a]:
+            return []
+        segments.append((a, b, on_route))
+    if any(reach[b][a] for a, b in zip(chain[1:-2], chain[2:-1])):
+        raise ValueError("a route passes through a cycle")
+    return segments
+
+
+def _count_along(graph, order: list[int]) -> int:
+    # routes from order[0] to order[-1], pushing counts in topological order
+    ptr = graph["indptr"].tolist()
+    nbr = graph["indices"].tolist()
+    routes = [0] * (len(ptr) - 1)
+    routes[order[0]] = 1
+    for u in order[:-1]:
+        count = routes[u]
+        for v in nbr[ptr[u] : ptr[u + 1]]:
+            routes[v] += count
+    return routes[order[-1]]
+
+
+def _count_between(graph, source: int, target: int) -> int:
+    order = route_order(graph, source, target)
+    return _count_along(graph, order) if order else 0
+
+
+def _count_factored(graph, source, target, required):
+    # a route meets the required nodes in a fixed order, so the count is the
+    # product of the routes along each leg between consecutive ones
+    segments = _needs_segments(graph, source, target, required)
+    orders = [_topological(graph, on_route, a, b) for a, b, on_route in segments]
+    total = 1 if orders else 0
+    for order in orders:
+        total *= _count_along(graph, order)
+    return total
+
+
+def _count_bitmask(graph, source, target, required):
+    # DP over (node, visited-required mask): one dense row of 2**r counts per
+    # node, kept only while some parent of it is still to be processed
+    segments = _needs_segments(graph, source, target, required)
+    if not segments:
+        return 0
+    on_route = np.logical_or.reduce([mask for _, _, mask in segments])
+    order = _topological(graph, on_route, source, target)
+    position = {u: i for i, u in enumerate(order)}
+    bit = {u: 1 << i for i, u in enumerate(required)}
+    masks = np.arange(1 << len(required))
+    with_bit = {b: masks[masks & b != 0] for b in bit.values()}
+
+    ptr = graph["indptr"].tolist()
+    nbr = graph["indices"].tolist()
+    rows = {source: np.zeros(len(masks), dtype=object)}
+    rows[source][0] = 1
+    for u in order[:-1]:  # the target is last and has no relevant children
+        row = rows.pop(u)
+        for v in nbr[ptr[u] : ptr[u + 1]]:
+            if v not in position:
+                continue
+            dest = rows.get(v)
+            if dest is None:
+                dest = rows[v] = np.zeros(len(masks), dtype=object)
+            b = bit.get(v)
+            if b is None:
+                dest += row
+            else:
+                # arriving at a required node sets its bit
+                hi = with_bit[b]
+                dest[hi] += row[hi] + row[hi ^ b]
+    return int(rows[target][-1]) if target in rows else 0
 
 
-def solve():
-    node_children = load()
-    # print(node_children)
-    total_routes = count_routes_forward("you", "out", node_children)
+NEEDS_METHODS = {
+    "factor": _count_factored,
+    "bitmask": _count_bitmask,
+}
+
+
+def count_routes(
+    graph, node_from: str, node_to: str, needs=None, *, method: str = "factor"
+) -> int:
+    """Routes from `node_from` to `node_to` in a CSR graph (see parse_graph).
+
+    Iterative: one Kahn sweep orders the nodes on any route, then a single
+    DP pass in that order accumulates the counts as Python ints. With
+    `needs`, only routes through every named node count; `method` picks
+    "factor" (product of route counts along the legs between the required
+    nodes, in the order routes meet them) or "bitmask" (DP over node x
+    visited-mask, 2**len(needs) counts per live node). Only cycles on routes
+    through every required node raise.
+    """
+    query = resolve_query(graph["names"], node_from, node_to, needs)
+    if isinstance(query, int):
+        return query
+    source, target, required = query
+    if not required:
+        return _count_between(graph, source, target)
+    return NEEDS_METHODS[method](graph, source, target, required)
+
+
+def _frontier_edges(indptr: np.ndarray, indices: np.ndarray, frontier: np.ndarray):
+    # (parent, child) for every edge leaving the frontier nodes
+    begin = indptr[frontier]
+    lengths = indptr[frontier + 1] - begin
+    offsets = np.repeat(np.cumsum(lengths) - lengths, lengths)
+    positions = np.arange(int(lengths.sum())) - offsets + np.repeat(begin, lengths)
+    return np.repeat(frontier, lengths), indices[positions]
+
+
+def _distinct(values: np.ndarray, stamp: np.ndarray) -> np.ndarray:
+    # drop repeated node ids in O(len(values)): of each group of duplicates,
+    # only the position whose write to `stamp` survived is kept
+    positions = np.arange(len(values))
+    stamp[values] = positions
+    return values[stamp[values] == positions]
+
+
+def _frontier_reach(indptr, indices, start, stop, stamp) -> np.ndarray:
+    # nodes reachable from `start` one frontier at a time, not expanding `stop`
+    seen = np.zeros(len(indptr) - 1, dtype=bool)
+    seen[start] = True
+    frontier = np.array([start])
+    while len(frontier):
+        _, children = _frontier_edges(indptr, indices, frontier[frontier != stop])
+        frontier = _distinct(children[~seen[children]], stamp)
+        seen[frontier] = True
+    return seen
+
+
+def topological_levels(
+    indptr: np.ndarray, indices: np.ndarray, source: int, stop: int | None = None
+):
+    """Kahn's algorithm one whole frontier at a time, from `source`.
+
+    Returns the levels of the subgraph reachable from `source` as arrays of
+    node ids; every edge goes from a level to a later one. With `stop`, the
+    edges out of it are left out and only nodes that also reach it are kept,
+    so the levels hold exactly the routes to `stop` ([] if there are none).
+    Raises ValueError if that subgraph has a cycle.
+    """
+    n = len(indptr) - 1
+    stamp = np.empty(n, dtype=np.int64)
+    seen = _frontier_reach(indptr, indices, source, stop, stamp)
+    if stop is not None:
+        seen &= _frontier_reach(*reverse_csr(indptr, indices), stop, None, stamp)
+        if not seen[source]:
+            return []
+
+    parents = np.repeat(np.arange(n), np.diff(indptr))
+    kept = seen[parents] & seen[indices] & (parents != stop)
+    indegree = np.bincount(indices[kept], minlength=n)
+    levels = []
+    frontier = np.array([source]) if not indegree[source] else np.array([], int)
+    while len(frontier):
+        levels.append(frontier)
+        _, children = _frontier_edges(indptr, indices, frontier[frontier != stop])
+        children = children[seen[children]]
+        np.subtract.at(indegree, children, 1)
+        frontier = _distinct(children[indegree[children] == 0], stamp)
+    if sum(map(len, levels)) != int(seen.sum()):
+        raise ValueError("the graph reachable from the source has a cycle")
+    return levels
+
+
+def count_routes_levels(
+    graph, node_from: str, node_to: str, needs=None, *, modulus: int | None = None
+) -> int:
+    """`count_routes`, propagated level by level with array operations.
+
+    Each topological level pushes its count vectors along its out-edges at
+    once: the edges are grouped by child and summed with np.add.reduceat,
+    i.e. a sparse mat-vec restricted to the frontier. Counts carry a second
+    axis of 2**len(needs) visited-masks. Exact counts use Python ints in
+    object arrays; `modulus` (2**64 for wrapping, or up to 2**32) keeps them
+    in uint64 instead. The nodes on routes from `node_from` to `node_to`
+    (routes end there) must be acyclic; cycles off those routes are ignored.
+    """
+    if modulus is not None and modulus != 2**64 and not 1 < modulus <= 2**32:
+        raise ValueError("modulus must be 2**64 or in (1, 2**32]")
+    query = resolve_query(graph["names"], node_from, node_to, needs)
+    if isinstance(query, int):
+        return query
+    source, target, required = query
+    indptr, indices = graph["indptr"], graph["indices"]
+
+    n = len(indptr) - 1
+    masks = np.arange(1 << len(required))
+    bits = np.zeros(n, dtype=np.int64)
+    bits[required] = 1 << np.arange(len(required))
+    counts = np.zeros((n, len(masks)), dtype=object if modulus is None else np.uint64)
+    counts[source, 0] = 1
+    for level in topological_levels(indptr, indices, source, stop=target):
+        # every count has arrived at this level: mark the required nodes
+        for node in level[bits[level] != 0].tolist():
+            hi = masks[masks & bits[node] != 0]
+            row = counts[node]
+            row[hi] += row[hi ^ bits[node]]
+            row[hi ^ bits[node]] = 0
+
+        parents, children = _frontier_edges(indptr, indices, level[level != target])
+        if not len(children):
+            continue
+        order = np.argsort(children)
+        children = children[order]
+        starts = np.flatnonzero(np.diff(children, prepend=-1))
+        touched = children[starts]
+        counts[touched] += np.add.reduceat(counts[parents[order]], starts, axis=0)
+        if modulus is not None and modulus != 2**64:
+            counts[touched] %= np.uint64(modulus)
+    return int(counts[target, -1])
+
+
+def strongly_connected_components(indptr: np.ndarray, indices: np.ndarray):
+    """Tarjan's algorithm without recursion.
+
+    Returns the component id of every node and the components as lists of
+    nodes, emitted sinks first (reverse topological order of the DAG).
+    """
+    ptr = indptr.tolist()
+    nbr = indices.tolist()
+    n = len(ptr) - 1
+    index = [-1] * n
+    low = [0] * n
+    on_stack = bytearray(n)
+    stack = []
+    comp = [-1] * n
+    components = []
+    counter = 0
+    for root in range(n):
+        if index[root] != -1:
+            continue
+        index[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack[root] = 1
+        work = [(root, ptr[root])]
+        while work:
+            u, i = work[-1]
+            if i < ptr[u + 1]:
+                work[-1] = (u, i + 1)
+                v = nbr[i]
+                if index[v] == -1:
+                    index[v] = low[v] = counter
+                    counter += 1
+                    stack.append(v)
+                    on_stack[v] = 1
+                    work.append((v, ptr[v]))
+                elif on_stack[v] and index[v] < low[u]:
+                    low[u] = index[v]
+                continue
+            work.pop()
+            if work and low[u] < low[work[-1][0]]:
+                low[work[-1][0]] = low[u]
+            if low[u] == index[u]:
+                members = []
+                while True:
+                    w = stack.pop()
+                    on_stack[w] = 0
+                    comp[w] = len(components)
+                    members.append(w)
+                    if w == u:
+                        break
+                components.append(members)
+    return comp, components
+
+
+class RouteGraph:
+    """A parsed graph answering many route-count queries.
+
+    Strongly connected components are condensed once, so cycles are handled
+    exactly: a query whose routes can loop raises ValueError, and cycles
+    elsewhere do not matter. Routes *to* each target are counted for every
+    node in one pass over the components and cached, so further sources
+    for a known target are a lookup; `needs` queries are products of the
+    cached tables of the required nodes, taken in topological order.
+    """
+
+    def __init__(self, graph):
+        self.names = graph["names"]
+        self._ptr = graph["indptr"].tolist()
+        self._nbr = graph["indices"].tolist()
+        self._comp, self._components = strongly_connected_components(
+            graph["indptr"], graph["indices"]
+        )
+        self._cyclic = [
+            len(members) > 1 or members[0] in self._children(members[0])
+            for members in self._components
+        ]
+        self._tables = {}
+        self._parts = {}
+
+    @classmethod
+    def from_children(cls, node_children):
+        return cls(csr_from_children(node_children))
+
+    @classmethod
+    def load(cls):
+        return cls(load_graph())
+
+    def _children(self, u):
+        return self._nbr[self._ptr[u] : self._ptr[u + 1]]
+
+    def _split(self, members, cut):
+        # a component without the edges out of the `cut` nodes, as its own
+        # components, sinks first, each with whether it can loop
+        local = {u: i for i, u in enumerate(members)}
+        indptr = [0]
+        indices = []
+        for u in members:
+            if u not in cut:
+                indices += [local[v] for v in self._children(u) if v in local]
+            indptr.append(len(indices))
+        _, parts = strongly_connected_components(
+            np.array(indptr), np.array(indices, dtype=np.int64)
+        )
+        for part in parts:
+            part = [members[i] for i in part]
+            u = part[0]
+            yield part, len(part) > 1 or (u not in cut and u in self._children(u))
+
+    def _settle(self, members, cyclic, target, avoid, routes, infinite):
+        # routes to `target` from one component, once its successors are done
+        if not cyclic:
+            u = members[0]
+            if u == target:
+                routes[u] = 1
+                return
+            if u == avoid:
+                return
+            total = 0
+            loops = 0
+            for v in self._children(u):
+                total += routes[v]
+                loops |= infinite[v]
+            routes[u] = total
+            infinite[u] = loops
+            return
+        inside = set(members)
+        if any(
+            routes[v] or infinite[v]
+            for u in members
+            for v in self._children(u)
+            if v not in inside
+        ):
+            for u in members:
+                infinite[u] = 1
+
+    def routes_to(self, target: int, avoid: int | None = None):
+        # (routes, infinite): per node, the routes ending at `target` that do
+        # not pass through `avoid`, and whether they can loop forever (then
+        # `routes` is meaningless). A route ends at `target`, so a cycle only
+        # through it (or through `avoid`) repeats nothing
+        table = self._tables.get((target, avoid))
+        if table is not None:
+            return table
+        n = len(self._ptr) - 1
+        routes = [0] * n
+        infinite = bytearray(n)
+        cut = {target, avoid} - {None}
+        split = {self._comp[u] for u in cut}
+        for c, members in enumerate(self._components):
+            if c in split and self._cyclic[c]:
+                for part, cyclic in self._split(members, cut):
+                    self._settle(part, cyclic, target, avoid, routes, infinite)
+            else:
+                self._settle(
+                    members, self._cyclic[c], target, avoid, routes, infinite
+                )
+        table = self._tables[(target, avoid)] = (routes, infinite)
+        return table
+
+    def _part_of(self, target: int):
+        # position of each node of the target's component once the edges out of
+        # the target are cut (sinks first); cached like the route tables
+        part_of = self._parts.get(target)
+        if part_of is None:
+            part_of = self._parts[target] = {}
+            c = self._comp[target]
+            if self._cyclic[c]:
+                parts = self._split(self._components[c], {target})
+                for i, (part, _) in enumerate(parts):
+                    part_of.update(dict.fromkeys(part, i))
+        return part_of
+
+    def count(self, node_from: str, node_to: str, needs=None) -> int:
+        query = resolve_query(self.names, node_from, node_to, needs)
+        if isinstance(query, int):
+            return query
+        source, target, required = query
+
+        # components are numbered sinks first, so descending is topological;
+        # the target's own component is ordered without the edges out of it
+        part_of = self._part_of(target)
+        required.sort(key=lambda r: (self._comp[r], part_of.get(r, 0)), reverse=True)
+        chain = [source, *required, target]
+
+        # a route ends at the target, so the segments before it avoid it
+        total = 1
+        loops = False
+        for a, b in zip(chain, chain[1:]):
+            routes, infinite = self.routes_to(b, None if b == target else target)
+            if infinite[a]:
+                loops = True
+            elif not routes[a]:
+                return 0
+            else:
+                total *= routes[a]
+        if loops:
+            raise ValueError(f"infinitely many routes from {node_from} to {node_to}")
+        return total
+
+
+def solve(graph=None):
+    graph = graph or RouteGraph.load()
+    total_routes = graph.count("you", "out")
     print(total_routes)
 
-def solve_part2():
-    node_children = load()
-    # print(node_children)
-    total_routes = count_routes_forward(
-        "svr", "out", node_children, needs=frozenset({"dac", "fft"})
-    )
+def solve_part2(graph=None):
+    graph = graph or RouteGraph.load()
+    total_routes = graph.count("svr", "out", needs={"dac", "fft"})
     print(total_routes)
 
 if __name__ == "__main__":
-    solve()
-    solve_part2()
+    graph = RouteGraph.load()
+    solve(graph)
+    solve_part2(graph)
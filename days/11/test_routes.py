@@ -0,0 +1,75 @@
+import importlib
+
+import numpy as np
+import pytest
+
+# integer in dir name breaks standard import
+day11 = importlib.import_module("days.11.attempt")
+
+
+def counts(children, node_from, node_to, needs=None):
+    graph = day11.csr_from_children(children)
+    return [
+        day11.count_routes(graph, node_from, node_to, needs, method="factor"),
+        day11.count_routes(graph, node_from, node_to, needs, method="bitmask"),
+        day11.count_routes_levels(graph, node_from, node_to, needs),
+        day11.RouteGraph(graph).count(node_from, node_to, needs),
+    ]
+
+
+def test_cycle_through_target_repeats_no_route():
+    assert counts({"a": {"t"}, "t": {"a"}}, "a", "t") == [1] * 4
+    assert counts({"s": {"t"}, "t": {"x"}, "x": {"t"}}, "s", "t") == [1] * 4
+    children = {"s": {"a", "b"}, "a": {"t"}, "b": {"t"}, "t": {"s", "a"}}
+    assert counts(children, "s", "t", {"b"}) == [1] * 4
+
+
+@pytest.mark.parametrize("engine", range(4))
+def test_cycle_before_target_is_infinite(engine):
+    graph = day11.csr_from_children({"s": {"a"}, "a": {"b", "t"}, "b": {"a"}})
+    run = [
+        lambda: day11.count_routes(graph, "s", "t"),
+        lambda: day11.count_routes(graph, "s", "t", {"a"}, method="bitmask"),
+        lambda: day11.count_routes_levels(graph, "s", "t"),
+        lambda: day11.RouteGraph(graph).count("s", "t"),
+    ][engine]
+    with pytest.raises(ValueError):
+        run()
+
+
+def test_edges_out_of_target_are_ignored():
+    # a random DAG, then edges from the target back into it: every cycle
+    # passes through the target, so the counts must not change
+    rng = np.random.default_rng(0)
+    for _ in range(20):
+        n = 30
+        children = {
+            f"n{i}": {f"n{j}" for j in range(i + 1, n) if rng.random() < 0.2}
+            for i in range(n)
+        }
+        t = f"n{int(rng.integers(n // 2, n))}"
+        needs = {f"n{int(rng.integers(1, n // 2))}"}
+        expected = counts(children, "n0", t, needs)
+        assert len(set(expected)) == 1
+        children[t] |= {f"n{int(j)}" for j in rng.integers(0, n, 5)}
+        assert counts(children, "n0", t, needs) == expected
+
+
+def test_cycle_off_the_required_routes_is_harmless():
+    # c <-> d loops on a route to t, but not on one through r
+    graph = day11.csr_from_children(
+        {"s": {"r", "c"}, "r": {"t"}, "c": {"d"}, "d": {"c", "t"}}
+    )
+    assert day11.count_routes(graph, "s", "t", {"r"}, method="factor") == 1
+    assert day11.count_routes(graph, "s", "t", {"r"}, method="bitmask") == 1
+    assert day11.RouteGraph(graph).count("s", "t", {"r"}) == 1
+    # a required node on no route at all gives 0 rather than a cycle error
+    assert day11.count_routes(graph, "s", "t", {"c", "r"}) == 0
+    assert day11.count_routes(graph, "s", "t", {"c", "r"}, method="bitmask") == 0
+
+
+def test_cycle_on_no_route_is_harmless():
+    # c loops on itself but never reaches t
+    assert counts({"s": {"a", "c"}, "a": {"t"}, "c": {"c"}}, "s", "t") == [1] * 4
+    assert counts({"s": {"a", "c"}, "a": {"t"}, "c": {"c"}}, "s", "t", {"a"}) == [1] * 4
+    assert counts({"s": {"c"}, "c": {"c"}, "t": set()}, "s", "t") == [0] * 4
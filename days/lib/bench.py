@@ -0,0 +1,249 @@
+"""Scaling benchmarks for the Python solvers on synthetic inputs.
+
+    python -m days.lib.bench                    # every suite
+    python -m days.lib.bench day08 --json bench.json --plot bench.png
+
+Each suite generates inputs at increasing sizes, times the solver (best of
+--repeat runs) and records the tracemalloc peak of one further run. The
+log-log slope between the largest sizes is reported as the empirical
+exponent, to check complexity claims and catch regressions.
+"""
+
+import argparse
+import contextlib
+import importlib
+import json
+import os
+import time
+import tracemalloc
+from dataclasses import dataclass
+
+import numpy as np
+
+# integer in dir name breaks standard import
+day02 = importlib.import_module("days.02.attempt")
+day03 = importlib.import_module("days.03.attempt")
+day08 = importlib.import_module("days.08.attempt")
+day11 = importlib.import_module("days.11.attempt")
+
+
+def gen_ranges(count, digits, rng):
+    # `count` ranges with up to `digits`-digit bounds; like the puzzle input,
+    # a range crosses at most one power of ten
+    out = []
+    for _ in range(count):
+        lo_digits = int(rng.integers(1, digits))
+        hi_digits = lo_digits + int(rng.integers(0, 2))
+        lo = int("".join(map(str, rng.integers(0, 10, lo_digits)))) or 1
+        lo = max(lo, 10 ** (lo_digits - 1))
+        hi = int("".join(map(str, rng.integers(0, 10, hi_digits))))
+        hi = max(hi, 10 ** (hi_digits - 1), lo)
+        out.append((lo, hi))
+    return out
+
+
+def gen_digit_lines(count, length, rng):
+    # battery banks: lines of `length` digits 1-9, as load_digits returns them
+    return rng.integers(1, 10, (count, length), dtype=np.uint8)
+
+
+def gen_points(count, rng, bits=24):
+    return rng.integers(0, (1 << bits) - 1, size=(count, 3), dtype=np.uint64)
+
+
+def gen_edges(count, rng):
+    # `count` random undirected edges over `count` nodes, as (i, j) rows
+    return rng.integers(0, count, size=(count, 2), dtype=np.intp)
+
+
+def gen_layered_dag(layers, width, fanout, rng):
+    # "svr" -> `layers` layers of `width` nodes -> "out", each node wired to
+    # `fanout` nodes of the next layer; "dac" and "fft" sit in the middle
+    names = [[f"n{l}_{w}" for w in range(width)] for l in range(layers)]
+    names[layers // 3][0] = "dac"
+    names[2 * layers // 3][0] = "fft"
+    children = {"svr": set(names[0]), "you": set(names[0])}
+    for l in range(layers - 1):
+        for name in names[l]:
+            picks = rng.choice(width, size=min(fanout, width), replace=False)
+            children[name] = {names[l + 1][p] for p in picks.tolist()}
+    for name in names[-1]:
+        children[name] = {"out"}
+    return children
+
+
+def run_day02(ranges):
+    starts, ends = zip(*ranges)
+    return day02.invalid_id_totals(
+        np.array(starts, dtype=object), np.array(ends, dtype=object)
+    )[1]
+
+
+def run_cc(backend):
+    # connected-component labels of an edge list, as top_m_cc_sizes gets them
+    def run(pairs):
+        roots = day08.CC_BACKENDS[backend](pairs, int(pairs.max()) + 1)
+        return np.sort(np.bincount(roots))[-3:].tolist()
+
+    return run
+
+
+def run_day11(graph):
+    return day11.count_routes(graph, "svr", "out", needs={"dac", "fft"})
+
+
+@dataclass
+class Suite:
+    name: str
+    sizes: list
+    make: object  # (size, rng) -> solver argument
+    run: object  # argument -> answer
+    note: str = ""
+
+
+SUITES = {
+    "day02": Suite(
+        "day02",
+        [100, 1_000, 10_000],
+        lambda size, rng: gen_ranges(size, 40, rng),
+        run_day02,
+        "ranges of up to 40 digits",
+    ),
+    "day03": Suite(
+        "day03",
+        [100, 1_000, 10_000],
+        lambda size, rng: gen_digit_lines(200, size, rng),
+        day03.solve_part2,
+        "200 lines of `size` digits, 12 picked",
+    ),
+    "day08": Suite(
+        "day08",
+        [1_000, 4_000, 16_000],
+        lambda size, rng: gen_points(size, rng),
+        lambda coords: day08.solve_coords(coords, k=len(coords), m=3)[1],
+        "`size` points, k = size",
+    ),
+    **{
+        f"day08_cc_{backend}": Suite(
+            f"day08_cc_{backend}",
+            [10_000, 100_000, 300_000],
+            lambda size, rng: gen_edges(size, rng),
+            run_cc(backend),
+            f"`size` random edges over `size` nodes, {backend} union-find",
+        )
+        for backend in ["batched", "python"]
+    },
+    "day11": Suite(
+        "day11",
+        [1_000, 10_000, 100_000],
+        lambda size, rng: day11.csr_from_children(
+            gen_layered_dag(max(3, size // 100), 100, 4, rng)
+        ),
+        run_day11,
+        "layers of 100 nodes, fan-out 4",
+    ),
+}
+
+
+@contextlib.contextmanager
+def quiet():
+    # the solvers print their intermediate results
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+def measure(run, arg, repeat):
+    best = float("inf")
+    with quiet():
+        for _ in range(repeat):
+            start = time.perf_counter()
+            answer = run(arg)
+            best = min(best, time.perf_counter() - start)
+        tracemalloc.start()
+        try:
+            run(arg)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    return answer, best, peak
+
+
+def exponent(sizes, seconds):
+    # slope of log(time) over log(size), from the two largest sizes
+    if len(sizes) < 2 or min(seconds[-2:]) <= 0:
+        return None
+    return float(np.log(seconds[-1] / seconds[-2]) / np.log(sizes[-1] / sizes[-2]))
+
+
+def run_suite(suite, *, sizes=None, repeat=3, seed=0):
+    rng = np.random.default_rng(seed)
+    rows = []
+    for size in sizes or suite.sizes:
+        arg = suite.make(size, rng)
+        answer, seconds, peak = measure(suite.run, arg, repeat)
+        rows.append(
+            {
+                "size": size,
+                "seconds": seconds,
+                "peak_bytes": peak,
+                "answer": str(answer),
+            }
+        )
+        print(
+            f"{suite.name} {size:>9} {seconds * 1e3:10.2f} ms "
+            f"{peak / 2**20:9.2f} MiB",
+            flush=True,
+        )
+    sizes = [row["size"] for row in rows]
+    seconds = [row["seconds"] for row in rows]
+    slope = exponent(sizes, seconds)
+    if slope is not None:
+        print(f"{suite.name} empirical exponent {slope:.2f} ({suite.note})")
+    return {"note": suite.note, "exponent": slope, "runs": rows}
+
+
+def plot(report, path):
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    fig, (ax_time, ax_mem) = plt.subplots(1, 2, figsize=(11, 4.5))
+    for name, result in report.items():
+        sizes = [row["size"] for row in result["runs"]]
+        seconds = [row["seconds"] for row in result["runs"]]
+        ax_time.loglog(sizes, seconds, "o-", label=name)
+        ax_mem.loglog(sizes, [row["peak_bytes"] for row in result["runs"]], "o-")
+    ax_time.set(xlabel="size", ylabel="seconds", title="time")
+    ax_mem.set(xlabel="size", ylabel="bytes", title="peak traced memory")
+    ax_time.legend()
+    fig.tight_layout()
+    fig.savefig(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("suites", nargs="*", help=f"subset of {list(SUITES)}")
+    parser.add_argument("--sizes", help="comma-separated sizes, overriding defaults")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="write the report here")
+    parser.add_argument("--plot", help="write scaling curves here (matplotlib)")
+    args = parser.parse_args()
+    if args.plot:
+        import matplotlib  # noqa: F401  (fail before benchmarking, not after)
+
+    sizes = [int(s) for s in args.sizes.split(",")] if args.sizes else None
+    report = {
+        name: run_suite(SUITES[name], sizes=sizes, repeat=args.repeat, seed=args.seed)
+        for name in (args.suites or SUITES)
+    }
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.plot:
+        plot(report, args.plot)
+
+
+if __name__ == "__main__":
+    main()
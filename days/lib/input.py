@@ -1,5 +1,15 @@
+import hashlib
+import json
+import os
+import tempfile
+from collections.abc import Callable, Iterator
 from pathlib import Path
 
+import numpy as np
+
+CACHE_DIR = ".input_cache"
+CACHE_FORMAT = 2  # bump when the sidecar layout changes
+
 
 def to_digits(n: int):
     return [int(d) for d in str(n)]
@@ -8,7 +18,191 @@ def to_int(digits: list[int]) -> int:
     return int("".join(str(d) for d in digits))
 
 
+def input_path(script_file: str) -> Path:
+    return Path(script_file).parent / "input.txt"
+
+
+def iter_input(script_file: str) -> Iterator[str]:
+    # streaming load_input: one stripped, non-empty line at a time
+    with open(input_path(script_file), "r") as f:
+        for line in f:
+            if stripped := line.strip():
+                yield stripped
+
+
 def load_input(script_file: str) -> list[str]:
-    input_path = Path(script_file).parent / "input.txt"
-    with open(input_path, "r") as f:
-        return [stripped for line in f.readlines() if (stripped := line.strip())]
+    return list(iter_input(script_file))
+
+
+def map_input(script_file: str) -> np.ndarray:
+    # the raw bytes of input.txt, memory-mapped read-only
+    path = input_path(script_file)
+    if path.stat().st_size == 0:
+        return np.empty(0, dtype=np.uint8)
+    return np.memmap(path, dtype=np.uint8, mode="r")
+
+
+def iter_line_buffers(script_file: str) -> Iterator[np.ndarray]:
+    # zero-copy uint8 views of each non-empty line of the mapped input
+    buf = map_input(script_file)
+    begin = 0
+    for end in [*np.flatnonzero(buf == ord("\n")).tolist(), len(buf)]:
+        line = buf[begin:end]
+        begin = end + 1
+        if len(line) and line[-1] == ord("\r"):
+            line = line[:-1]
+        if len(line):
+            yield line
+
+
+def parse_uints(buf: np.ndarray, *, columns: int | None = None, dtype=np.uint64):
+    """Every run of ASCII digits in `buf` as an unsigned integer.
+
+    Anything else (commas, dashes, whitespace, newlines) separates values.
+    With `columns`, the result is reshaped to `(-1, columns)`.
+    """
+    digits = buf - np.uint8(ord("0"))
+    is_digit = digits < 10
+    edges = np.flatnonzero(np.diff(is_digit, prepend=False, append=False))
+    starts, ends = edges[::2], edges[1::2]
+
+    lengths = ends - starts
+    width = int(lengths.max()) if len(lengths) else 0
+    limit = np.iinfo(dtype).max
+    if width > len(str(np.iinfo(np.uint64).max)) - 1:
+        raise ValueError(f"{width}-digit value does not fit {np.dtype(dtype)}")
+
+    # Horner over digit positions, numbers right-aligned on their last digit
+    values = np.zeros(len(starts), dtype=np.uint64)
+    for offset in range(width, 0, -1):
+        pos = ends - offset
+        inside = pos >= starts
+        d = digits[np.where(inside, pos, 0)].astype(np.uint64)
+        values = np.where(inside, values * np.uint64(10) + d, values)
+    if len(values) and values.max() > limit:
+        raise ValueError(f"value {values.max()} does not fit {np.dtype(dtype)}")
+
+    values = values.astype(dtype)
+    if columns is not None:
+        if len(values) % columns:
+            raise ValueError(f"{len(values)} values do not fill {columns} columns")
+        values = values.reshape(-1, columns)
+    return values
+
+
+def load_uints(script_file: str, *, columns: int | None = None, dtype=np.uint64):
+    return parse_uints(map_input(script_file), columns=columns, dtype=dtype)
+
+
+def load_digits(script_file: str) -> np.ndarray:
+    # one row of uint8 digits per line, e.g. `987654321111` lines. Every line
+    # must be as wide as the first, so the rows are a strided view of the map
+    buf = map_input(script_file)
+    end = len(buf)
+    while end and buf[end - 1] in b"\r\n":
+        end -= 1
+    if not end:
+        return np.empty((0, 0), dtype=np.uint8)
+
+    newlines = np.flatnonzero(buf[:end] == ord("\n"))
+    first = int(newlines[0]) if len(newlines) else end
+    width = first - int(first > 0 and buf[first - 1] == ord("\r"))
+    stride = first + 1
+    rows = len(newlines) + 1
+    if (end - width) != (rows - 1) * stride or not np.array_equal(
+        newlines, np.arange(1, rows) * stride - 1
+    ):
+        raise ValueError("lines have different numbers of digits")
+
+    lines = np.lib.stride_tricks.as_strided(
+        buf, shape=(rows, width), strides=(stride, 1), writeable=False
+    )
+    digits = lines - np.uint8(ord("0"))
+    if (digits >= 10).any():
+        raise ValueError("lines contain characters other than digits")
+    return digits
+
+
+def _file_digest(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(1 << 20):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _replace_atomically(directory: Path, path: Path, write: Callable):
+    # `write(f)` into a private temp file, then rename it over `path`, so
+    # concurrent writers never share a temp file and readers never see half
+    with tempfile.NamedTemporaryFile(
+        dir=directory, prefix=f"{path.stem}.", suffix=".tmp", delete=False
+    ) as f:
+        try:
+            write(f)
+        except BaseException:
+            os.unlink(f.name)
+            raise
+    os.replace(f.name, path)
+
+
+def load_cached(script_file: str, name: str, parse: Callable, *, version: int = 1):
+    """`parse(script_file)`, cached as .npy sidecars next to input.txt.
+
+    `parse` returns an array or a dict of arrays. The cache is reused while
+    input.txt keeps its mtime and size, or its content hash if those moved,
+    and is loaded memory-mapped. Bump `version` whenever `parse` changes its
+    output so stale sidecars are reparsed. INPUT_CACHE=0 always parses.
+    """
+    if os.getenv("INPUT_CACHE", "1") == "0":
+        return parse(script_file)
+
+    path = input_path(script_file)
+    stat = path.stat()
+    cache = path.parent / CACHE_DIR / name
+    meta_path = cache / "meta.json"
+    meta = json.loads(meta_path.read_text()) if meta_path.exists() else None
+    if meta is not None and (meta.get("format"), meta.get("version")) != (
+        CACHE_FORMAT,
+        version,
+    ):
+        meta = None  # written by another parser or layout
+
+    fresh = meta is not None and (
+        (meta["mtime_ns"], meta["size"]) == (stat.st_mtime_ns, stat.st_size)
+    )
+    if meta is not None and not fresh:
+        digest = _file_digest(path)
+        if meta["sha256"] == digest:  # touched, not changed
+            meta.update(mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+            _replace_atomically(
+                cache, meta_path, lambda f: f.write(json.dumps(meta).encode())
+            )
+            fresh = True
+    if fresh:
+        arrays = {
+            key: np.load(cache / f"{key}.npy", mmap_mode="r") for key in meta["arrays"]
+        }
+        return arrays["array"] if meta["single"] else arrays
+
+    parsed = parse(script_file)
+    single = isinstance(parsed, np.ndarray)
+    arrays = {"array": parsed} if single else parsed
+    cache.mkdir(parents=True, exist_ok=True)
+    meta_path.unlink(missing_ok=True)  # meta.json is written last, when complete
+    for key, array in arrays.items():
+        _replace_atomically(
+            cache,
+            cache / f"{key}.npy",
+            lambda f, array=array: np.save(f, np.asarray(array), allow_pickle=False),
+        )
+    meta = {
+        "format": CACHE_FORMAT,
+        "version": version,
+        "mtime_ns": stat.st_mtime_ns,
+        "size": stat.st_size,
+        "sha256": _file_digest(path),
+        "single": single,
+        "arrays": list(arrays),
+    }
+    _replace_atomically(cache, meta_path, lambda f: f.write(json.dumps(meta).encode()))
+    return parsed
@@ -0,0 +1,39 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from days.lib.input import CACHE_DIR, load_cached, load_uints
+
+
+def _parse(script_file):
+    return load_uints(script_file, columns=2)
+
+
+def _load(script_file):
+    ranges = np.asarray(load_cached(script_file, "ranges", _parse))
+    return ranges.shape, ranges[:3].tolist()
+
+
+def _script(tmp_path, repeat=1):
+    (tmp_path / "input.txt").write_text("11-22,95-115\n998-1012\n" * repeat)
+    return str(tmp_path / "attempt.py")
+
+
+def test_cold_cache_survives_concurrent_writers(tmp_path, monkeypatch):
+    monkeypatch.delenv("INPUT_CACHE", raising=False)
+    # big enough that the writers' parses and saves overlap
+    script = _script(tmp_path, repeat=100_000)
+    with ProcessPoolExecutor(8) as pool:
+        results = list(pool.map(_load, [script] * 8))
+    assert results == [((300_000, 2), [[11, 22], [95, 115], [998, 1012]])] * 8
+    assert not list((tmp_path / CACHE_DIR / "ranges").glob("*.tmp"))
+
+
+def test_parser_version_invalidates_cache(tmp_path, monkeypatch):
+    monkeypatch.delenv("INPUT_CACHE", raising=False)
+    script = _script(tmp_path)
+    load_cached(script, "ranges", _parse)
+    cached = load_cached(script, "ranges", lambda f: np.zeros(1), version=1)
+    assert np.asarray(cached).shape == (3, 2)  # same version: sidecar served
+    reparsed = load_cached(script, "ranges", lambda f: np.zeros(1), version=2)
+    assert np.asarray(reparsed).shape == (1,)
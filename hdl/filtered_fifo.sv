@@ -1,7 +1,7 @@
 module filtered_fifo #(
     parameter int  BIT_WIDTH  = 32,
     parameter int  MAX_INPUTS = 4,
-    parameter int  FIFO_DEPTH = 256,
+    parameter int  FIFO_DEPTH = 256 * MAX_INPUTS,  // total, split across the lanes
     parameter type DATA_TYPE  = logic [BIT_WIDTH-1:0]
 ) (
     input logic clk,
@@ -70,7 +70,7 @@ module filtered_fifo #(
       wire [FIFO_PTR_WIDTH-1:0] adjusted_index = (index - next_fifo_write);
       fifo #(
           .BIT_WIDTH  (BIT_WIDTH),
-          .DEPTH      (256),
+          .DEPTH      (FIFO_DEPTH / MAX_INPUTS),
           .READ_CYCLES(0),          // change to 1 if timing issues arise
           .DATA_TYPE  (DATA_TYPE)
       ) fifo (
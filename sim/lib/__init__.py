@@ -1,3 +1,3 @@
-from .sim import build_and_run_sim, reset
+from .sim import build_and_run_sim, reset, sim_param
 
-__all__ = ["build_and_run_sim", "reset"]
+__all__ = ["build_and_run_sim", "reset", "sim_param"]
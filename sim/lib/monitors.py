@@ -0,0 +1,165 @@
+import json
+import os
+from array import array
+
+import cocotb
+import numpy as np
+from cocotb.triggers import ReadOnly, RisingEdge
+
+
+def _read(handle):
+    # X/Z (e.g. before the first reset edge reaches a register) reads as 0
+    try:
+        return int(handle.value)
+    except ValueError:
+        return 0
+
+
+def _runs(flags):
+    # histogram {length: count} of the consecutive runs of true samples
+    padded = np.concatenate(([0], flags.astype(np.int8), [0]))
+    edges = np.flatnonzero(np.diff(padded))
+    lengths, counts = np.unique(edges[1::2] - edges[::2], return_counts=True)
+    return dict(zip(lengths.tolist(), counts.tolist()))
+
+
+class Handshake:
+    """A valid/ready pair; a multi-bit `valid` counts as valid when non-zero.
+
+    Without `ready` the stage never stalls, and every valid cycle transfers.
+    """
+
+    def __init__(self, name, valid, ready=None):
+        self.name = name
+        self.valid = valid
+        self.ready = ready
+        self.samples = bytearray()  # per cycle: bit 0 valid, bit 1 ready
+
+    def sample(self):
+        valid = _read(self.valid) != 0
+        ready = self.ready is None or _read(self.ready) != 0
+        self.samples.append(valid | ready << 1)
+
+    def report(self, cycles):
+        samples = np.frombuffer(bytes(self.samples), dtype=np.uint8)
+        valid = (samples & 1).astype(bool)
+        ready = (samples & 2).astype(bool)
+        transfers = np.flatnonzero(valid & ready)
+        stalled = valid & ~ready
+        n = len(transfers)
+        active = int(transfers[-1] - transfers[0]) + 1 if n else 0
+        return {
+            "transfers": n,
+            "first_transfer": int(transfers[0]) if n else None,
+            "last_transfer": int(transfers[-1]) if n else None,
+            "utilization": n / cycles if cycles else 0.0,
+            "active_utilization": n / active if active else 0.0,
+            "stall_cycles": int(stalled.sum()),
+            "stall_histogram": _runs(stalled),
+            "not_ready_cycles": int((~ready).sum()),
+            "not_ready_histogram": _runs(~ready),
+        }
+
+
+class State:
+    """Occupancy of a state register, keyed by `names[value]` when given."""
+
+    def __init__(self, name, signal, names=None):
+        self.name = name
+        self.signal = signal
+        self.names = names
+        self.samples = array("q")
+
+    def sample(self):
+        self.samples.append(_read(self.signal))
+
+    def _label(self, value):
+        if self.names is not None and value < len(self.names):
+            return self.names[value]
+        return str(value)
+
+    def report(self, cycles):
+        samples = np.frombuffer(self.samples, dtype=np.int64)
+        values, counts = np.unique(samples, return_counts=True)
+        labels = [self._label(value) for value in values.tolist()]
+        return {
+            "occupancy": dict(zip(labels, counts.tolist())),
+            "fraction": {
+                label: count / cycles if cycles else 0.0
+                for label, count in zip(labels, counts.tolist())
+            },
+            "dwell_histogram": {
+                label: _runs(samples == value)
+                for label, value in zip(labels, values.tolist())
+            },
+        }
+
+
+class PerfMonitor:
+    """Samples a set of probes once per cycle and writes a JSON report.
+
+    Probes are read in the ReadOnly phase after each rising edge, counting
+    from the cycle `start()` is called. `mark(label)` records the current
+    cycle so benches can report phase boundaries and total latency.
+    SIM_PERF=0 turns the monitor into a no-op.
+    """
+
+    def __init__(self, clk, probes, *, name=None, parameters=None):
+        self.clk = clk
+        self.probes = list(probes)
+        self.name = name if name is not None else cocotb.top._name
+        self.parameters = dict(parameters or {})
+        self.enabled = os.getenv("SIM_PERF", "1") != "0"
+        self.cycle = 0
+        self.marks = {}
+        self._task = None
+
+    def start(self):
+        if self.enabled:
+            self._task = cocotb.start_soon(self._sample())
+        return self._task
+
+    async def _sample(self):
+        edge = RisingEdge(self.clk)
+        read_only = ReadOnly()
+        probes = self.probes
+        while True:
+            await edge
+            await read_only
+            for probe in probes:
+                probe.sample()
+            self.cycle += 1
+
+    def mark(self, label):
+        self.marks[label] = self.cycle
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def report(self):
+        cycles = self.cycle
+        marks = dict(sorted(self.marks.items(), key=lambda item: item[1]))
+        labels = list(marks)
+        return {
+            "name": self.name,
+            "profile": os.getenv("SIM_PROFILE"),
+            "parameters": self.parameters,
+            "cycles": cycles,
+            "marks": marks,
+            "phases": {
+                f"{a}->{b}": marks[b] - marks[a] for a, b in zip(labels, labels[1:])
+            },
+            "stages": {probe.name: probe.report(cycles) for probe in self.probes},
+        }
+
+    def write(self, path=None):
+        # lands next to results.xml, where sim.regress picks it up
+        self.stop()
+        if not self.enabled:
+            return None
+        path = path or os.getenv("SIM_PERF_REPORT") or f"{self.name}.perf.json"
+        with open(path, "w") as f:
+            json.dump(self.report(), f, indent=2)
+        return path
@@ -1,19 +1,119 @@
 # from `lefin-filter` project
 # https://github.com/luciengaitskell/lefin-filter/blob/f272140183fb8aff9ca3704c46bb1a4aa0934ba5/sim/lib/sim.py
+import hashlib
+import json
 import os
+import re
 import sys
+from importlib.metadata import version
 from pathlib import Path
 
 from cocotb.triggers import ClockCycles
 from cocotb_tools.runner import get_runner
 
+from .waves import start_wave_window
+
+BUILD_KEY_FILE = ".build_key"
+
+# SIM_PROFILE (or profile=) picks how much observability the model is built with
+SIM_PROFILES = {
+    # full FST of every signal, every cycle
+    "debug": {
+        "build_args": ["--trace", "--trace-fst", "--trace-structs"],
+        "waves": True,
+    },
+    # no tracing compiled in, optimised model
+    "fast": {"build_args": ["-O3"], "waves": False},
+    # fast model plus a testbench-side VCD of a cycle window (see waves.py)
+    "windowed": {"build_args": ["-O3"], "waves": False},
+}
+
+
+def sim_param(name, default):
+    # bench constants can be overridden per run with SIM_PARAM_<NAME>, which
+    # reaches both the build script and the test module inside the simulator
+    value = os.getenv(f"SIM_PARAM_{name}")
+    return default if value is None else type(default)(value)
+
 
 async def reset(clk, rst, cycles_held=3, polarity=1):
+    start_wave_window(clk)  # no-op outside the "windowed" profile
     rst.value = polarity
     await ClockCycles(clk, cycles_held)
     rst.value = not polarity
 
 
+def _strip_comments(text):
+    return re.sub(r"//[^\n]*|/\*.*?\*/", "", text, flags=re.DOTALL)
+
+
+def module_sources(hdl_toplevel, source_paths):
+    # only the files `hdl_toplevel` transitively instantiates, plus any file
+    # that defines no module (packages, headers)
+    texts = {path: _strip_comments(Path(path).read_text()) for path in source_paths}
+    defined_in = {}
+    for path, text in texts.items():
+        for name in re.findall(r"^\s*module\s+(\w+)", text, flags=re.MULTILINE):
+            defined_in[name] = path
+    names = re.compile(r"\b(" + "|".join(map(re.escape, defined_in)) + r")\b")
+
+    needed = set()
+    stack = [hdl_toplevel] if hdl_toplevel in defined_in else []
+    while stack:
+        path = defined_in[stack.pop()]
+        if path in needed:
+            continue
+        needed.add(path)
+        stack.extend(n for n in set(names.findall(texts[path])) if n in defined_in)
+
+    return [
+        path
+        for path in source_paths
+        if path in needed or path not in defined_in.values()
+    ]
+
+
+def module_parameters(hdl_toplevel, source_paths):
+    # names of the parameters declared in `hdl_toplevel`'s header
+    for path in source_paths:
+        text = _strip_comments(Path(path).read_text())
+        header = rf"^\s*module\s+{re.escape(hdl_toplevel)}\b([^;]*)"
+        match = re.search(header, text, flags=re.MULTILINE)
+        if match:
+            return re.findall(r"\bparameter\b[^=,;]*?\b(\w+)\s*=", match.group(1))
+    return None
+
+
+def build_key(*, sim, hdl_toplevel, sources, includes, parameters, build_args):
+    # content hash of everything that feeds the simulator build
+    digest = hashlib.sha256()
+
+    def add_file(path):
+        digest.update(str(path).encode())
+        digest.update(hashlib.sha256(Path(path).read_bytes()).digest())
+
+    for source in sources:
+        add_file(source)
+    for include in includes:
+        if Path(include).is_dir():
+            for path in sorted(Path(include).rglob("*")):
+                if path.is_file():
+                    add_file(path)
+    digest.update(
+        json.dumps(
+            {
+                "sim": sim,
+                "toplevel": hdl_toplevel,
+                "parameters": {k: str(v) for k, v in sorted(parameters.items())},
+                "build_args": list(build_args),
+                "waves": os.getenv("WAVES"),
+                "cocotb": version("cocotb"),
+            },
+        ).encode()
+    )
+    return digest.hexdigest()
+
+
 def build_and_run_sim(
     test_file,
     *,
@@ -21,9 +121,15 @@ def build_and_run_sim(
     additional_sources: list[str] | None = None,
     includes: list[str] | None = None,
     parameters: dict | None = None,
+    profile: str | None = None,
 ):
     if parameters is None:
         parameters = {}
+    if profile is None:
+        profile = os.getenv("SIM_PROFILE", "debug")
+    if profile not in SIM_PROFILES:
+        raise ValueError(f"unknown profile {profile!r}, expected {list(SIM_PROFILES)}")
+    waves = SIM_PROFILES[profile]["waves"]
 
     sim = os.getenv("SIM", "verilator")
     runner = get_runner(sim)
@@ -31,18 +137,19 @@ def build_and_run_sim(
     # https://docs.cocotb.org/en/v1.9.2/simulator_support.html#verilator
     build_test_args = [
         "-Wall",
-        # Enable tracing and fst generation
-        "--trace",
-        "--trace-fst",
-        "--trace-structs",
+        *SIM_PROFILES[profile]["build_args"],
         # Enable non-blocking assignments
         "--timing",
     ]
+    threads = int(os.getenv("SIM_THREADS", "1"))
+    if not waves and threads > 1:
+        build_test_args += ["--threads", str(threads)]
     proj_path = Path(__file__).resolve().parent.parent.parent
     source_root = Path(proj_path / "hdl")
     source_paths = list(source_root.glob("**/*.sv"))
     if additional_sources:
         source_paths += [proj_path / source for source in additional_sources]
+    source_paths = module_sources(hdl_toplevel, source_paths)
     includes_paths = [source_root / "model" / "includes"]
     includes_paths += [proj_path / "hdl" / inc for inc in includes] if includes else []
 
@@ -51,21 +158,49 @@ def build_and_run_sim(
 
     test_module = os.path.basename(test_file).replace(".py", "")
 
-    runner.build(
+    build_name = hdl_toplevel if profile == "debug" else f"{hdl_toplevel}.{profile}"
+    build_dir = Path(os.getenv("SIM_BUILD_ROOT", "sim_build")) / build_name
+    key = build_key(
+        sim=sim,
+        hdl_toplevel=hdl_toplevel,
         sources=source_paths,
         includes=includes_paths,
-        hdl_toplevel=hdl_toplevel,
-        always=True,
-        build_dir=Path("sim_build") / hdl_toplevel,
-        build_args=build_test_args,
         parameters=parameters,
-        timescale=("1ns", "1ps"),
-        waves=True,
+        build_args=build_test_args,
     )
+    key_file = build_dir / BUILD_KEY_FILE
+    cached = (
+        os.getenv("SIM_REBUILD", "0") != "1"
+        and key_file.exists()
+        and key_file.read_text() == key
+        and (sim != "verilator" or (build_dir / hdl_toplevel).exists())
+    )
+
+    if cached:
+        print(f"reusing {build_dir} (build key {key[:12]})")
+    else:
+        key_file.unlink(missing_ok=True)  # never trust a half-finished build
+        runner.build(
+            sources=source_paths,
+            includes=includes_paths,
+            hdl_toplevel=hdl_toplevel,
+            always=True,
+            build_dir=build_dir,
+            build_args=build_test_args,
+            parameters=parameters,
+            timescale=("1ns", "1ps"),
+            waves=waves,
+        )
+        key_file.write_text(key)
+
     run_test_args = []
     runner.test(
         hdl_toplevel=hdl_toplevel,
         test_module=test_module,
         test_args=run_test_args,
-        waves=True,
+        build_dir=build_dir,
+        parameters=parameters,
+        timescale=("1ns", "1ps"),
+        waves=waves,
+        extra_env={"SIM_PROFILE": profile},
     )
@@ -0,0 +1,93 @@
+import os
+from collections import deque
+
+import cocotb
+from cocotb.handle import LogicArrayObject, LogicObject
+from cocotb.simtime import get_sim_time
+from cocotb.triggers import ReadOnly, RisingEdge
+
+DEFAULT_WINDOW_CYCLES = 2000
+
+
+def _window_from_env():
+    # SIM_WAVE_WINDOW="N" keeps the last N cycles (i.e. up to a failing
+    # assertion), "A:B" records cycles A..B inclusive
+    spec = os.getenv("SIM_WAVE_WINDOW", str(DEFAULT_WINDOW_CYCLES))
+    if ":" in spec:
+        start, end = spec.split(":")
+        return None, int(start), int(end)
+    return int(spec), 0, None
+
+
+def _vcd_id(i):
+    chars = []
+    i += 1
+    while i:
+        i, r = divmod(i - 1, 94)
+        chars.append(chr(33 + r))
+    return "".join(chars)
+
+
+class WaveWindow:
+    """Testbench-side VCD of the toplevel's packed signals over a cycle window.
+
+    Used by the "windowed" simulation profile, where the model is built
+    without tracing so only the recorded window costs anything. Only the
+    toplevel's own signals are sampled: submodule internals (e.g. the sorter
+    or union_find state) are not in the window unless passed as `signals`.
+    Each sample is stamped with the simulation time in ns, matching the
+    declared timescale.
+    """
+
+    def __init__(self, dut, clk, *, path="window.vcd", signals=None):
+        self.clk = clk
+        self.path = path
+        if signals is None:
+            signals = [
+                h for h in dut if isinstance(h, (LogicObject, LogicArrayObject))
+            ]
+        self.signals = sorted(signals, key=lambda h: h._name)
+        keep, self.start, self.end = _window_from_env()
+        self.samples = deque(maxlen=keep)
+
+    async def record(self):
+        cycle = 0
+        try:
+            while self.end is None or cycle <= self.end:
+                await RisingEdge(self.clk)
+                await ReadOnly()
+                if cycle >= self.start:
+                    self.samples.append(
+                        (
+                            round(get_sim_time("ns")),
+                            [str(h.value) for h in self.signals],
+                        )
+                    )
+                cycle += 1
+        finally:
+            # also runs when the test ends and this task is cancelled
+            self.write()
+
+    def write(self):
+        ids = [_vcd_id(i) for i in range(len(self.signals))]
+        with open(self.path, "w") as f:
+            f.write("$timescale 1ns $end\n$scope module top $end\n")
+            for handle, vid in zip(self.signals, ids):
+                f.write(f"$var wire {len(handle)} {vid} {handle._name} $end\n")
+            f.write("$upscope $end\n$enddefinitions $end\n")
+            previous = [None] * len(self.signals)
+            for time, values in self.samples:
+                f.write(f"#{time}\n")
+                for i, (value, vid) in enumerate(zip(values, ids)):
+                    if value != previous[i]:
+                        sep = "" if len(value) == 1 else " "
+                        prefix = "" if len(value) == 1 else "b"
+                        f.write(f"{prefix}{value.lower()}{sep}{vid}\n")
+                        previous[i] = value
+
+
+def start_wave_window(clk, **kwargs):
+    if os.getenv("SIM_PROFILE") != "windowed":
+        return None
+    window = WaveWindow(cocotb.top, clk, **kwargs)
+    return cocotb.start_soon(window.record())
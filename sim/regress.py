@@ -0,0 +1,181 @@
+"""Run every cocotb bench concurrently, each in its own build directory.
+
+    python -m sim.regress                           # everything
+    python -m sim.regress day08 -p BATCH_SIZE=2,4,8 -p FIFO_DEPTH=1024,2048
+
+Positional arguments filter benches by substring. Each -p NAME=v1,v2 adds a
+sweep axis: the selected benches run once per combination, with the values
+passed as SIM_PARAM_<NAME> (see sim.lib.sim_param). An axis only applies to
+benches whose toplevel declares that parameter. Benches run with the
+trace-free "fast" simulation profile unless --profile says otherwise.
+"""
+
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from cocotb_tools.runner import get_results
+
+from sim.lib.sim import module_parameters
+
+ROOT = Path(__file__).resolve().parent.parent
+BENCH_GLOBS = ["sim/test_*.py", "days/*/test_hdl_attempt.py"]
+
+
+def discover(filters=()):
+    benches = sorted(path for g in BENCH_GLOBS for path in ROOT.glob(g))
+    return [
+        path
+        for path in benches
+        if not filters or any(f in str(path.relative_to(ROOT)) for f in filters)
+    ]
+
+
+def module_name(path):
+    return ".".join(path.relative_to(ROOT).with_suffix("").parts)
+
+
+def toplevel_parameters(bench):
+    # parameters the bench's hdl_toplevel declares, None if it can't be found
+    match = re.search(r"hdl_toplevel\s*=\s*[\"'](\w+)[\"']", bench.read_text())
+    if match is None:
+        return None
+    sources = [*ROOT.glob("hdl/**/*.sv"), *ROOT.glob("days/*/*.sv")]
+    return module_parameters(match.group(1), sources)
+
+
+def bench_grid(bench, grid):
+    # sweep axes the toplevel does not declare are dropped, and the points
+    # that collapse onto each other run once
+    declared = toplevel_parameters(bench)
+    points = []
+    for params in grid:
+        if declared is not None:
+            params = {k: v for k, v in params.items() if k in declared}
+        if params not in points:
+            points.append(params)
+    return points
+
+
+def run_job(bench, params, work_root, profile):
+    label = module_name(bench)
+    tag = hashlib.sha256(json.dumps(params, sort_keys=True).encode()).hexdigest()[:8]
+    job_dir = work_root / f"{label}-{tag}"
+    job_dir.mkdir(parents=True, exist_ok=True)
+    for stale in [*job_dir.glob("*/results.xml"), *job_dir.glob("*/*.perf.json")]:
+        stale.unlink()
+
+    env = {
+        **os.environ,
+        "SIM_BUILD_ROOT": str(job_dir),
+        "SIM_PROFILE": profile,
+        "PYTHONPATH": os.pathsep.join(
+            p for p in [str(ROOT), os.getenv("PYTHONPATH")] if p
+        ),
+        **{f"SIM_PARAM_{name}": str(value) for name, value in params.items()},
+    }
+    start = time.perf_counter()
+    with open(job_dir / "run.log", "w") as log:
+        proc = subprocess.run(
+            [sys.executable, "-m", label],
+            cwd=ROOT,
+            env=env,
+            stdout=log,
+            stderr=subprocess.STDOUT,
+        )
+    elapsed = time.perf_counter() - start
+
+    tests = failed = 0
+    results = list(job_dir.glob("*/results.xml"))
+    for result in results:
+        n, f = get_results(result)
+        tests += n
+        failed += f
+    if proc.returncode != 0 or not results:
+        status = "ERROR"
+    else:
+        status = "FAIL" if failed else "PASS"
+    perf = {
+        path.name.removesuffix(".perf.json"): json.loads(path.read_text())
+        for path in job_dir.glob("*/*.perf.json")
+    }
+
+    return {
+        "bench": label,
+        "params": params,
+        "status": status,
+        "tests": tests,
+        "failed": failed,
+        "seconds": round(elapsed, 2),
+        "log": str(job_dir / "run.log"),
+        "perf": perf,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("filters", nargs="*", help="substrings of bench paths")
+    parser.add_argument(
+        "-p",
+        "--param",
+        action="append",
+        default=[],
+        metavar="NAME=V1,V2",
+        help="sweep a bench parameter",
+    )
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count())
+    parser.add_argument("--profile", default="fast", help="simulation profile")
+    parser.add_argument("--work-dir", type=Path, default=ROOT / "sim_regress")
+    parser.add_argument("--json", type=Path, help="also write the report here")
+    args = parser.parse_args()
+
+    axes = []
+    for spec in args.param:
+        name, _, values = spec.partition("=")
+        axes.append([(name, v) for v in values.split(",")])
+    grid = [dict(combo) for combo in itertools.product(*axes)]
+
+    benches = discover(args.filters)
+    jobs = [(bench, params) for bench in benches for params in bench_grid(bench, grid)]
+    print(f"running {len(jobs)} jobs on {args.jobs} workers")
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(args.jobs) as pool:
+        futures = [
+            pool.submit(run_job, b, p, args.work_dir, args.profile) for b, p in jobs
+        ]
+        report = []
+        for future in futures:
+            entry = future.result()
+            report.append(entry)
+            params = " ".join(f"{k}={v}" for k, v in entry["params"].items())
+            cycles = " ".join(
+                f"{name}:{perf['cycles']}cyc" for name, perf in entry["perf"].items()
+            )
+            print(
+                f"{entry['status']:5} {entry['bench']:32} {params:32} "
+                f"{entry['tests'] - entry['failed']}/{entry['tests']} "
+                f"{entry['seconds']:8.1f}s {cycles}"
+            )
+    wall = time.perf_counter() - start
+
+    serial = sum(entry["seconds"] for entry in report)
+    passed = sum(entry["status"] == "PASS" for entry in report)
+    print(f"{passed}/{len(report)} passed in {wall:.1f}s wall ({serial:.1f}s serial)")
+    if args.json:
+        args.json.write_text(
+            json.dumps({"wall_seconds": round(wall, 2), "jobs": report}, indent=2)
+        )
+    return 0 if passed == len(report) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
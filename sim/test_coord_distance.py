@@ -2,12 +2,12 @@ import cocotb
 from cocotb.clock import Clock
 from cocotb.triggers import ClockCycles, ReadOnly
 import numpy as np
-from sim.lib import build_and_run_sim, reset
+from sim.lib import build_and_run_sim, reset, sim_param
 
 
-COORD_BIT_WIDTH = 8
-DIMENSIONS = 3
-BATCH_SIZE = 4
+COORD_BIT_WIDTH = sim_param("COORD_BIT_WIDTH", 8)
+DIMENSIONS = sim_param("DIMENSIONS", 3)
+BATCH_SIZE = sim_param("BATCH_SIZE", 4)
 
 
 def generate_test_data(size):
@@ -2,11 +2,11 @@ import random
 import cocotb
 from cocotb.clock import Clock
 from cocotb.triggers import ClockCycles, ReadOnly
-from sim.lib import build_and_run_sim, reset
+from sim.lib import build_and_run_sim, reset, sim_param
 
 
-BIT_WIDTH = 32
-DEPTH = 16
+BIT_WIDTH = sim_param("BIT_WIDTH", 32)
+DEPTH = sim_param("DEPTH", 16)
 
 
 def generate_test_data(size):
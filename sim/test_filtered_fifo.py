@@ -2,12 +2,12 @@ import cocotb
 from cocotb.clock import Clock
 from cocotb.triggers import ClockCycles, RisingEdge
 import random
-from sim.lib import build_and_run_sim, reset
+from sim.lib import build_and_run_sim, reset, sim_param
 
 
-BIT_WIDTH = 8
-MAX_INPUTS = 4
-FIFO_DEPTH = 256
+BIT_WIDTH = sim_param("BIT_WIDTH", 8)
+MAX_INPUTS = sim_param("MAX_INPUTS", 4)
+FIFO_DEPTH = sim_param("FIFO_DEPTH", 256 * MAX_INPUTS)
 
 
 def generate_test_data(size):
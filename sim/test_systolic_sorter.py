@@ -1,10 +1,10 @@
 import cocotb
 from cocotb.clock import Clock
 from cocotb.triggers import ClockCycles, RisingEdge, ReadOnly
-from sim.lib import build_and_run_sim, reset
+from sim.lib import build_and_run_sim, reset, sim_param
 
 
-NUM_ELEMENTS = 10
+NUM_ELEMENTS = sim_param("ELEMENTS", 10)
 
 
 @cocotb.test
@@ -1,10 +1,10 @@
 import cocotb
 from cocotb.clock import Clock
 from cocotb.triggers import ClockCycles, ReadOnly, RisingEdge, FallingEdge
-from sim.lib import build_and_run_sim, reset
+from sim.lib import build_and_run_sim, reset, sim_param
 
 
-MAX_NODE_COUNT = 8
+MAX_NODE_COUNT = sim_param("MAX_NODE_COUNT", 8)
 STATE_READIN = 0
 
 